@@ -3,21 +3,26 @@ Main agent implementation using LangGraph.
 Handles intent detection, routing, and execution of various commands.
 """
 
+import asyncio
 import json
+from collections import Counter, OrderedDict
+from functools import lru_cache
 import time
-from typing import List, Dict, Any, Literal, Sequence, Optional
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage, messages_from_dict, messages_to_dict
+import orjson
+from typing import List, Dict, Any, Literal, Sequence, Optional, AsyncIterator, Iterator
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage, BaseMessage, messages_from_dict, messages_to_dict, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
 from langchain.agents import create_tool_calling_agent, AgentExecutor
-from langgraph.graph import StateGraph, START, END, MessagesState
+from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.types import Command, interrupt
+from langgraph.types import Command, Send, interrupt
 from typing_extensions import Annotated, TypedDict
 import pandas as pd
 
 from config import Config
 from domain.api_client import SyncrowAPIClient
-from domain.objects import Device, Intent, DeviceFunction, DeviceSchedule, Scene
-from llm import get_qwen_llm
+from domain.objects import Device, Intent, IntentList, DeviceFunction, DeviceSchedule, Scene
+from llm import get_qwen_llm, get_small_llm
 from llm.langsmith_config import setup_langsmith, create_run_name
 from memory import ChatMemory
 from tool_registry import ToolRegistry
@@ -26,25 +31,95 @@ from prompts.prompt_manager import prompt_manager
 from utils.normalizer import MessageNormalizer
 from utils.logger import get_logger, log_intent_detection, log_conversation_turn, log_performance
 
+# Nodes whose LLM output is the reply the user sees
+STREAMED_NODES = ("enhance_response", "chat_node")
+
+# Graph node that handles each detected intent type
+INTENT_ROUTES = {
+    "ambiguous": "request_clarification",
+    "control": "handle_control",
+    "query": "handle_query",
+    "schedule": "handle_schedule",
+    "high_risk": "request_confirmation",
+    "conversation": "chat_node",
+    "scene": "handle_scene",
+}
+
+# Where the confirmation flow goes for each reply; anything else asks again
+CONFIRMATION_ROUTES = {
+    "confirmed": "handle_control",
+    "cancelled": END,
+    "unclear": "request_confirmation",
+}
+
+def _final_reply(content: str) -> AIMessage:
+    """An AI reply that is already user-ready; the enhancer leaves it as is."""
+    return AIMessage(content=content, additional_kwargs={"skip_enhance": True})
+
 class GraphState(TypedDict):
     """State model for the agent graph."""
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    intents: List[Intent]
+    normalized: Sequence[BaseMessage]
 
 class RagentChatbot:
     """Main chatbot agent using LangGraph."""
     
     def __init__(self):
         self.llm = get_qwen_llm()
+        # Tone-only rewriting does not need the main model
+        self.enhance_llm = get_small_llm()
+        # Bind the intent schema once rather than regenerating it every turn
+        self._intent_classifier = self.llm.with_structured_output(IntentList, method=Config.INTENT_OUTPUT_METHOD)
         self.memory = ChatMemory()
         self.tool_registry = ToolRegistry()
         self.api_client = self.tool_registry.get_api_client()
         self.device_service = DeviceService(self.api_client)
+        
+        # The toolset is fixed, so build the tool-calling agent once and reuse it every turn
+        tools = self.tool_registry.get_all_tools()
+        self._agent = create_tool_calling_agent(
+            llm=self.llm,
+            tools=tools,
+            prompt=self.tool_registry.get_agent_prompt()
+        )
+        self._agent_executor = AgentExecutor(agent=self._agent, tools=tools, verbose=False)
         self.normalizer = MessageNormalizer()
         self.logger = get_logger(__name__)
+        # Device and scene lists last written to the memory store, used to skip redundant
+        # puts, and the device rendering for the intent prompt
+        self._stored_devices = None
+        self._stored_scenes = None
+        self._devices_prompt_text = ""
+        self._device_capabilities_text = ""
+        # Raw reply -> enhanced reply, least recently used first
+        self._enhanced_replies: OrderedDict = OrderedDict()
+        # Raw reply -> in-flight enhancement task shared by concurrent turns
+        self._pending_enhancements: Dict[str, asyncio.Task] = {}
+        # How each reply left the enhancer, to tune ENHANCE_MIN_CHARS against the rewrite rate
+        self._enhance_outcomes: Counter = Counter()
         
         # Setup LangSmith for tracking and debugging
         self.langsmith_enabled = setup_langsmith()
         
+        # Static parts of every run config, merged with the per-turn values in _prepare_run
+        self._base_config = {
+            "configurable": {
+                "base_store": self.memory.get_base_store(),
+                "token": None,  # Will be set after login
+                "user_uuid": Config.USER_UUID,
+                "project_uuid": Config.PROJECT_UUID,
+                "community_uuid": Config.COMMUNITY_UUID,
+                "space_uuid": Config.SPACE_UUID,
+            },
+            "recursion_limit": Config.RECURSION_LIMIT
+        }
+        self._base_metadata = {
+            "user_id": Config.USER_UUID,
+            "project": Config.LANGSMITH_PROJECT,
+            "conversation_type": "smart_home_assistant"
+        }
+        
         self.graph = self._build_graph()
     
     def refresh_token(self) -> bool:
@@ -105,12 +180,17 @@ class RagentChatbot:
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow."""
-        builder = StateGraph(MessagesState)
+        builder = StateGraph(GraphState)
         
         # Add nodes
+        builder.add_node("normalize", self._normalize)
         builder.add_node("detect_intent", self._detect_intent)
         builder.add_node("request_clarification", self._request_clarification)
-        builder.add_node("request_confirmation", self._request_confirmation)
+        builder.add_node(
+            "request_confirmation",
+            self._request_confirmation,
+            destinations=("handle_control", "request_confirmation", END)
+        )
         builder.add_node("handle_query", self._handle_query)
         builder.add_node("handle_schedule", self._handle_schedule)
         builder.add_node("handle_control", self._handle_control)
@@ -119,13 +199,13 @@ class RagentChatbot:
         builder.add_node("enhance_response", self._enhance_response)
         
         # Add edges
-        builder.add_edge(START, "detect_intent")
+        builder.add_edge(START, "normalize")
+        builder.add_edge("normalize", "detect_intent")
         builder.add_conditional_edges(
             "detect_intent",
             self._route_message,
             {
                 "request_clarification": "request_clarification",
-                "request_confirmation": "request_confirmation",
                 "handle_control": "handle_control",
                 "handle_query": "handle_query",
                 "handle_schedule": "handle_schedule",
@@ -142,316 +222,495 @@ class RagentChatbot:
         builder.add_edge("chat_node", END)
         builder.add_edge("enhance_response", END)
         
-        # Handle confirmation flow
-        builder.add_conditional_edges(
-            "request_confirmation",
-            lambda state: {
-                "confirmed": "handle_control",
-                "cancelled": END,
-                "unclear": "request_confirmation"
-            }.get(state.get("next_action", "unclear"), "request_confirmation"),
-            {
-                "handle_control": "handle_control",
-                "request_confirmation": "request_confirmation",
-                END: END
-            }
-        )
+        # The confirmation flow routes itself with Command (see _request_confirmation)
         
-        return builder.compile()
+        # Checkpoint per thread so each turn only sends the new message
+        return builder.compile(checkpointer=self.memory.get_memory_saver())
+    
+    def _normalize(self, state: GraphState) -> GraphState:
+        """Normalize the conversation once per turn so later nodes can reuse it."""
+        return {"normalized": MessageNormalizer.normalize_messages(state["messages"])}
     
-    def _detect_intent(self, state: GraphState) -> GraphState:
+    async def _detect_intent(self, state: GraphState) -> GraphState:
         """Detect intent from user message using centralized services."""
-        raw_messages = state["messages"]
-        
-        # Get devices using centralized service
-        collected_devices = self.device_service.get_devices_in_space(
-            Config.PROJECT_UUID, Config.COMMUNITY_UUID, Config.SPACE_UUID
+        # Get devices and prefetch scenes concurrently so a scene turn needs no extra round-trip
+        collected_devices, collected_scenes = await asyncio.gather(
+            self.device_service.aget_devices_in_space(Config.PROJECT_UUID, Config.COMMUNITY_UUID, Config.SPACE_UUID),
+            self.device_service.aget_scenes(Config.PROJECT_UUID, Config.COMMUNITY_UUID, Config.SPACE_UUID)
         )
         
-        if not collected_devices:
-            return {"messages": [AIMessage("Failed at Fetching Devices")] + state["messages"]}
-        
-        # Store devices
-        namespace = ("devices", Config.USER_UUID)
-        self.memory.get_base_store().put(namespace, Config.USER_UUID, collected_devices)
+        store = self.memory.get_base_store()
+        if collected_scenes != self._stored_scenes:
+            store.put(("scenes", Config.USER_UUID), Config.USER_UUID, collected_scenes)
+            self._stored_scenes = collected_scenes
         
-        # Normalize messages using centralized utility
-        messages = MessageNormalizer.normalize_messages(raw_messages)
+        if not collected_devices:
+            return {"messages": [AIMessage("Failed at Fetching Devices")], "intents": []}
+        
+        # Store devices only when they changed: the service returns the same list object while
+        # its cache is fresh, and a refetch usually returns an equal list
+        if collected_devices is not self._stored_devices:
+            if collected_devices != self._stored_devices:
+                store.put(("devices", Config.USER_UUID), Config.USER_UUID, collected_devices)
+                store.put(
+                    ("devices_by_uuid", Config.USER_UUID),
+                    Config.USER_UUID,
+                    {device.uuid: device for device in collected_devices}
+                )
+                # Compact JSON: valid for the model to read and fewer prompt tokens than a repr;
+                # unset optional fields are dropped rather than spelled out as null
+                self._devices_prompt_text = orjson.dumps(
+                    [device.model_dump(exclude_none=True) for device in collected_devices]
+                ).decode()
+                # Function codes of the product types present, so control intents can be resolved in one call
+                self._device_capabilities_text = "\n".join(
+                    description
+                    for product_type in sorted({device.product_type for device in collected_devices if device.product_type})
+                    for description in self.device_service.get_device_descriptions(product_type)
+                )
+            self._stored_devices = collected_devices
         
         # Find user message using centralized utility
-        user_msg = MessageNormalizer.find_user_message(messages)
+        user_msg = MessageNormalizer.find_user_message(state["normalized"])
         if not user_msg:
             raise ValueError("No user message found")
         
         # Create prompt using centralized template
-        devices_json = [device.__dict__ for device in collected_devices]
-        prompt = prompt_manager.get_intent_detection_prompt(user_msg, str(devices_json))
+        prompt = prompt_manager.get_intent_detection_prompt(
+            user_msg, self._devices_prompt_text, self._device_capabilities_text
+        )
         
-        llm_with_intent = self.llm.bind_tools([Intent], parallel_tool_calls=True)
-        response = llm_with_intent.invoke([
+        # Schema-constrained output parses straight into Intent objects; device commands
+        # without a device are turned into "ambiguous" by the model's validator
+        intent_list = await self._intent_classifier.ainvoke([
             SystemMessage(content="You are an intent classifier"),
             HumanMessage(content=prompt)
         ])
         
-        # Set ambiguous for None device_uuid
-        for tool_call in response.tool_calls:
-            if tool_call["args"].get("device_uuid") is None:
-                tool_call["args"]["Intent"] = "ambiguous"
-        
-        return {**state, "messages": state["messages"] + [response]}
+        return {"intents": intent_list.intents}
     
-    def _route_message(self, state: GraphState) -> List[Literal["request_confirmation", "request_clarification", "handle_query", "handle_control", "handle_schedule", "handle_scene", "chat_node", END]]:
+    def _route_message(self, state: GraphState) -> List[Send | Literal["chat_node", END]]:
         """Route message based on detected intent."""
-        message = state["messages"][-1]
-        if len(message.tool_calls) == 0:
-            return END
-        
-        next_nodes = set()
-        for tool_call in message.tool_calls:
-            intent = tool_call["args"].get("Intent", "conversation")  # Default to conversation
-            if intent == "ambiguous":
-                next_nodes.add("request_clarification")
-            elif intent == "control":
-                next_nodes.add("handle_control")
-            elif intent == "query":
-                next_nodes.add("handle_query")
-            elif intent == "schedule":
-                next_nodes.add("handle_schedule")
-            elif intent == "high_risk":
-                next_nodes.add("request_confirmation")
-            elif intent == "conversation":
-                next_nodes.add("chat_node")
-            elif intent == "scene":
-                next_nodes.add("handle_scene")
+        intents = state.get("intents")
+        if not intents:
+            # Detection may already have replied (e.g. devices could not be fetched);
+            # otherwise the message holds no command and is answered as conversation
+            return END if isinstance(state["messages"][-1], AIMessage) else "chat_node"
+        
+        branch_intents: Dict[str, List[Intent]] = {}
+        for detected in intents:
+            # Default to conversation for unknown intents
+            node = INTENT_ROUTES.get(detected.Intent, "chat_node")
+            branch_intents.setdefault(node, []).append(detected)
+        
+        # Intent handlers run concurrently in one step, each on a snapshot holding only its
+        # own intents; their messages merge back through the add_messages reducer.
+        # The confirmation also needs the conversation for its interrupt payload.
+        routes = []
+        for node, node_intents in branch_intents.items():
+            if node == "chat_node":
+                routes.append(node)
+            elif node == "request_confirmation":
+                routes.append(Send(node, {"intents": node_intents, "messages": state["messages"]}))
             else:
-                # Default to conversation for unknown intents
-                next_nodes.add("chat_node")
-        
-        return list(next_nodes)
+                routes.append(Send(node, {"intents": node_intents}))
+        return routes
     
-    def _handle_query(self, state: GraphState) -> GraphState:
+    def _iter_unique_intents(self, state: GraphState, intent_type: str) -> Iterator[Intent]:
+        """Yield the turn's intents of one type, skipping repeats of the same command."""
+        seen = set()
+        for intent in state["intents"]:
+            if intent.Intent != intent_type:
+                continue
+            key = (intent.Intent, intent.device_uuid, intent.user_message)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield intent
+    
+    async def _handle_query(self, state: GraphState) -> GraphState:
         """Handle device status queries."""
-        message = state["messages"][-1]
-        user_messages = []
+        # One reading per device, however many intents asked about it
+        device_uuids = list(dict.fromkeys(intent.device_uuid for intent in self._iter_unique_intents(state, "query")))
+        
+        # Query all devices concurrently so latency is bounded by the slowest call
+        results = await asyncio.gather(
+            *(self.device_service.aquery_device_status(device_uuid) for device_uuid in device_uuids),
+            return_exceptions=True
+        )
         
-        for tool_call in message.tool_calls:
-            if tool_call["args"]["Intent"] == "query":
-                device_uuid = tool_call["args"]["device_uuid"]
-                user_messages.append({"device_uuid": device_uuid})
+        # Template the readings as prose here so no enhancement round-trip is needed
+        stored = self.memory.get_base_store().get(("devices_by_uuid", Config.USER_UUID), Config.USER_UUID)
+        device_by_uuid = stored.value if stored else {}
         
         query_responses = []
-        for user_message in user_messages:
-            status = self.api_client.get_status(user_message["device_uuid"])
-            query_responses.append(status)
+        for device_uuid, result in zip(device_uuids, results):
+            device = device_by_uuid.get(device_uuid)
+            device_name = device.name if device else device_uuid
+            if isinstance(result, Exception):
+                query_responses.append(f"Could not read the status of {device_name}: {result}")
+            else:
+                query_responses.append(self.device_service.describe_device_status(device_name, result["status"]))
         
-        return {**state, "messages": state["messages"] + [AIMessage(content=str(query_responses))]}
+        return {
+            "messages": [_final_reply("\n".join(query_responses))]
+        }
     
-    def _handle_control(self, state: GraphState) -> GraphState:
+    async def _handle_control(self, state: GraphState) -> GraphState:
         """Handle device control commands using centralized service."""
-        start_time = time.time()
-        message = state["messages"][-1]
-        devices = self.memory.get_base_store().search(("devices", Config.USER_UUID))
+        start_time = time.perf_counter()
+        store = self.memory.get_base_store()
+        devices = store.search(("devices", Config.USER_UUID))
+        stored = store.get(("devices_by_uuid", Config.USER_UUID), Config.USER_UUID)
+        # Nothing stored yet means no device can be matched
+        device_by_uuid = stored.value if stored else {}
         
         user_messages = []
         
-        for tool_call in message.tool_calls:
-            device_uuid = tool_call["args"].get("device_uuid")
-            user_message = tool_call["args"].get("user_message", "")
-            
-            if tool_call["args"].get("Intent") == "control" and device_uuid:
-                product_type = [device.product_type for device in devices[0].value if device.uuid == device_uuid]
-                if product_type:
-                    user_messages.append({
-                        "device_uuid": device_uuid,
-                        "product_type": product_type[0],
-                        "user_message": user_message
-                    })
+        for intent in self._iter_unique_intents(state, "control"):
+            device = device_by_uuid.get(intent.device_uuid)
+            if device is not None:
+                user_messages.append({
+                    "device_uuid": intent.device_uuid,
+                    "product_type": device.product_type,
+                    "user_message": intent.user_message,
+                    # Resolved by the classifier when it could; skips the control extraction call
+                    "code": intent.code,
+                    "value": intent.value
+                })
+        
+        if not user_messages:
+            return {
+                "messages": [_final_reply("No matching device was found to control.")]
+            }
         
         # Use centralized device service for control operations
-        control_responses = self.device_service.control_multiple_devices(user_messages, devices[0].value)
+        control_responses = await self.device_service.acontrol_multiple_devices(user_messages, devices[0].value)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "handle_control", duration, {"device_count": len(user_messages)})
         
         return {
-            **state,
-            "messages": state["messages"] + [
+            "messages": [
                 AIMessage(content="Device control result(s): " + "\n".join(control_responses))
             ]
-        }    
-    def _handle_scene(self, state: GraphState) -> GraphState:
+        }
+    
+    async def _handle_scene(self, state: GraphState) -> GraphState:
         """Handle scene activation using centralized service."""
-        message = state["messages"][-1]
-        
-        user_message = ""
-        for tool_call in message.tool_calls:
-            if tool_call["args"]["Intent"] == "scene":
-                user_message = tool_call["args"]["user_message"]
-                break
+        scene_intent = next(self._iter_unique_intents(state, "scene"), None)
+        user_message = scene_intent.user_message if scene_intent else ""
         
-        # Get scenes using centralized service
-        collected_scenes = self.device_service.get_scenes(Config.PROJECT_UUID, Config.COMMUNITY_UUID, Config.SPACE_UUID)
+        # Scenes were prefetched alongside the devices in _detect_intent
+        stored_scenes = self.memory.get_base_store().get(("scenes", Config.USER_UUID), Config.USER_UUID)
+        if stored_scenes is not None:
+            collected_scenes = stored_scenes.value
+        else:
+            collected_scenes = await self.device_service.aget_scenes(Config.PROJECT_UUID, Config.COMMUNITY_UUID, Config.SPACE_UUID)
         
         # Use centralized service for scene activation
-        result = self.device_service.trigger_scene_by_name(user_message, collected_scenes)
+        result = await self.device_service.atrigger_scene_by_name(user_message, collected_scenes)
         
         if result["success"]:
             return {
-                "messages": state["messages"] + [AIMessage(content=f"{result['scene_name']} Scene: " + str(result["response"]))]
+                "messages": [_final_reply(f"{result['scene_name']} Scene: " + orjson.dumps(result["response"], default=str).decode())]
             }
         else:
             return {
-                "messages": state["messages"] + [AIMessage(content="Scene not found or could not be activated")]
+                "messages": [_final_reply("Scene not found or could not be activated")]
             }
     
-    def _handle_schedule(self, state: GraphState) -> GraphState:
+    async def _handle_schedule(self, state: GraphState) -> GraphState:
         """Handle device scheduling using centralized service."""
-        message = state["messages"][-1]
         user_messages = []
         
-        for tool_call in message.tool_calls:
-            device_uuid = tool_call["args"]["device_uuid"]
-            user_message = tool_call["args"]["user_message"]
-            if tool_call["args"]["Intent"] == "schedule":
-                user_messages.append({"device_uuid": device_uuid, "user_message": user_message})
+        for intent in self._iter_unique_intents(state, "schedule"):
+            user_messages.append({"device_uuid": intent.device_uuid, "user_message": intent.user_message})
         
         # Use centralized service for device scheduling
-        AI_messages = self.device_service.schedule_multiple_devices(user_messages)
+        AI_messages = await self.device_service.aschedule_multiple_devices(user_messages)
+        if not AI_messages:
+            return {
+                "messages": [_final_reply("No schedule could be created from that request.")]
+            }
         
-        return {**state, "messages": state["messages"] + [AIMessage(content=str(AI_messages))]}
+        return {"messages": [AIMessage(content=orjson.dumps(AI_messages, default=str).decode())]}
     
-    def _chat_node(self, state: GraphState) -> GraphState:
+    async def _chat_node(self, state: GraphState) -> GraphState:
         """Handle general chat with tool-calling agent support using centralized utilities."""
-        messages = state["messages"]
-        
-        # Normalize messages using centralized utility
-        lc_messages = MessageNormalizer.normalize_messages(messages)
+        lc_messages = state["normalized"]
         
         # Filter out incomplete tool call sequences using centralized utility
         filtered_messages = MessageNormalizer.filter_tool_call_messages(lc_messages)
         
-        # Create agent executor
-        agent = create_tool_calling_agent(
-            llm=self.llm, 
-            tools=self.tool_registry.get_all_tools(), 
-            prompt=self.tool_registry.get_agent_prompt()
+        # Keep only the recent tail of the conversation within the token budget
+        filtered_messages = trim_messages(
+            filtered_messages[-Config.CHAT_HISTORY_MAX_TURNS * 2:],
+            max_tokens=Config.CHAT_HISTORY_MAX_TOKENS,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+            include_system=True
         )
-        agent_executor = AgentExecutor(agent=agent, tools=self.tool_registry.get_all_tools(), verbose=True)
-        
-        # Run the agent with filtered history
-        agent_output = agent_executor.invoke({
-            "input": lc_messages[-1].content,
-            "chat_history": filtered_messages
-        })
         
-        return {**state, "messages": state["messages"] + [AIMessage(content=agent_output["output"])]}
+        # Chit-chat the classifier marked as needing no tools is answered in one model call
+        conversation_intents = [intent for intent in state.get("intents", []) if intent.Intent == "conversation"]
+        if conversation_intents and all(intent.tools_needed is False for intent in conversation_intents):
+            if not filtered_messages or filtered_messages[-1].type != "human":
+                filtered_messages = [*filtered_messages, HumanMessage(content=lc_messages[-1].content)]
+            reply = await self.llm.ainvoke([
+                SystemMessage(content=prompt_manager.get_agent_system_prompt()),
+                *filtered_messages
+            ])
+            output = reply.content
+        else:
+            # Run the agent with filtered history
+            agent_output = await self._agent_executor.ainvoke({
+                "input": lc_messages[-1].content,
+                "chat_history": filtered_messages
+            })
+            output = agent_output["output"]
+        
+        return {"messages": [AIMessage(content=output)]}
     
     def _request_clarification(self, state: GraphState) -> GraphState:
         """Request clarification for ambiguous commands using centralized templates."""
-        message = state["messages"][-1]
-        response_message = ""
+        ambiguous_intents = [intent for intent in state["intents"] if intent.Intent == "ambiguous"]
         
-        for tool_call in message.tool_calls:
-            if tool_call["args"]["Intent"] == "ambiguous":
-                reason = tool_call["args"]["reason"]
-                user_message = tool_call["args"]["user_message"]
-                response_message += "Failed to handle the following instruction: " + str(user_message) + "\n"
-                response_message += "Reason: " + str(reason)
+        # The classifier already phrased the questions, so no enhancement round-trip is needed
+        questions = [intent.polished_ack for intent in ambiguous_intents]
+        if questions and all(questions):
+            return {
+                "messages": [_final_reply("\n".join(dict.fromkeys(questions)))]
+            }
+        
+        # Collect the pieces and join once rather than growing a string per intent
+        parts = []
+        for intent in ambiguous_intents:
+            parts.append(f"Failed to handle the following instruction: {intent.user_message}\nReason: {intent.reason}")
         
         # Use centralized template for clarification
-        clarification_prompt = prompt_manager.get_clarification_request_prompt(response_message, "")
+        clarification_prompt = prompt_manager.get_clarification_request_prompt("\n".join(parts), "")
         
         return {
-            **state,
-            "messages": state["messages"] + [AIMessage(content=clarification_prompt)]
+            "messages": [AIMessage(content=clarification_prompt)]
         }
     
-    def _request_confirmation(self, state: GraphState) -> GraphState:
+    def _request_confirmation(self, state: GraphState) -> Command:
         """Request confirmation for high-risk actions using centralized templates."""
         confirmation_message = prompt_manager.get_confirmation_request_prompt("high-risk action", "high")
-        state["messages"] = state["messages"] + [AIMessage(content=confirmation_message)]
+        new_messages = [AIMessage(content=confirmation_message)]
         
         confirmation_response = interrupt({
-            "question": "Do you want to confirm this high-risk action?",
-            "messages": messages_to_dict(state["messages"]),
+            "question": confirmation_message,
+            # Only the recent tail goes into the payload, not the whole conversation
+            "messages": messages_to_dict(list(state["messages"][-3:]) + new_messages),
             "action_summary": state.get("action", "unknown action")
         })
         
-        state["messages"] = state["messages"] + [HumanMessage(content=confirmation_response)]
+        new_messages.append(HumanMessage(content=confirmation_response))
         
+        intents = state["intents"]
         if confirmation_response.lower() in ["confirm", "yes", "approve"]:
-            return {**state, "next_action": "confirmed"}
+            outcome = "confirmed"
+            # Exactly the confirmed actions are carried out, as ordinary control commands
+            intents = [intent.model_copy(update={"Intent": "control"}) for intent in intents]
         elif confirmation_response.lower() in ["cancel", "no"]:
-            return {**state, "next_action": "cancelled"}
+            outcome = "cancelled"
+            new_messages.append(AIMessage(content="Okay, the action was cancelled."))
         else:
-            state["messages"] = state["messages"] + [
-                AIMessage(content="Please reply with 'confirm' or 'cancel'.")
-            ]
-            return {**state, "next_action": "unclear"}
+            outcome = "unclear"
+            new_messages.append(AIMessage(content="Please reply with 'confirm' or 'cancel'."))
+        
+        node = CONFIRMATION_ROUTES[outcome]
+        if node == END:
+            return Command(update={"messages": new_messages}, goto=END)
+        return Command(
+            update={"messages": new_messages},
+            goto=Send(node, {"intents": intents, "messages": [*state["messages"], *new_messages]})
+        )
     
-    def _enhance_response(self, state: GraphState) -> GraphState:
+    async def _enhance_response(self, state: GraphState) -> GraphState:
         """Enhance response with friendlier tone using centralized templates."""
+        start_time = time.perf_counter()
         last = state["messages"][-1]
         if not isinstance(last, AIMessage):
-            return state
+            return {}
+        
+        # The intent classifier may already have produced a user-facing sentence
+        polished_ack = self._find_polished_ack(state.get("intents", []))
+        if polished_ack:
+            self._record_enhance_outcome("polished_ack", start_time)
+            return {"messages": [AIMessage(content=f"{polished_ack}\n\n{last.content}", id=last.id)]}
+        
+        # Templated and very short replies are not worth a second generation
+        if last.additional_kwargs.get("skip_enhance") or len(last.content) < Config.ENHANCE_MIN_CHARS:
+            self._record_enhance_outcome("skipped", start_time)
+            return {}
+        
+        # Boilerplate replies recur, so reuse an earlier rewrite of the same text
+        cached = self._enhanced_replies.get(last.content)
+        if cached is not None:
+            self._enhanced_replies.move_to_end(last.content)
+            self._record_enhance_outcome("cached", start_time)
+            return {"messages": [AIMessage(content=cached, id=last.id)]}
+        
+        # Concurrent turns that produced the same reply share a single rewrite call
+        pending = self._pending_enhancements.get(last.content)
+        if pending is None:
+            pending = asyncio.ensure_future(self._rewrite_reply(last.content))
+            self._pending_enhancements[last.content] = pending
+            pending.add_done_callback(lambda _, key=last.content: self._pending_enhancements.pop(key, None))
         
+        try:
+            enhanced_content = await asyncio.shield(pending)
+        except Exception:
+            self._record_enhance_outcome("failed", start_time)
+            return {}
+        
+        self._record_enhance_outcome("rewritten", start_time)
+        # Reusing the id makes the add_messages reducer replace the last message in place
+        return {"messages": [AIMessage(content=enhanced_content, id=last.id)]}
+    
+    def _record_enhance_outcome(self, outcome: str, start_time: float):
+        """Count how a reply left the enhancer and log it with the running totals."""
+        self._enhance_outcomes[outcome] += 1
+        log_performance(
+            self.logger, "enhance_response", time.perf_counter() - start_time,
+            {"outcome": outcome, "outcomes": dict(self._enhance_outcomes)}
+        )
+    
+    async def _rewrite_reply(self, content: str) -> str:
+        """Rewrite a reply with the small model and remember the result."""
         # Use centralized template for response enhancement
-        enhance_prompt = prompt_manager.get_response_enhancement_prompt(last.content)
+        enhance_prompt = prompt_manager.get_response_enhancement_prompt(content)
+        
+        enhanced = await self.enhance_llm.ainvoke([
+            SystemMessage(content="You are a response enhancer that improves tone only."),
+            HumanMessage(content=enhance_prompt)
+        ])
         
+        self._enhanced_replies[content] = enhanced.content
+        if len(self._enhanced_replies) > Config.ENHANCE_CACHE_SIZE:
+            self._enhanced_replies.popitem(last=False)
+        return enhanced.content
+    
+    def _find_polished_ack(self, intents: List[Intent]) -> Optional[str]:
+        """Return the classifier's acknowledgement when every intent this turn supplied one."""
+        acks = [
+            intent.polished_ack if intent.Intent in ("query", "conversation") else None
+            for intent in intents
+        ]
+        if acks and all(acks):
+            return " ".join(dict.fromkeys(acks))
+        return None
+    
+    def chat(self, message: str, history: list, thread_id: str = "default_thread") -> str:
+        """Synchronous chat interface kept for callers without an event loop."""
+        return asyncio.run(self._chat_once(message, history, thread_id))
+    
+    async def _chat_once(self, message: str, history: list, thread_id: str) -> str:
+        """Run one turn on a private event loop and close the async pool bound to it."""
         try:
-            enhanced = self.llm.invoke([
-                SystemMessage(content="You are a response enhancer that improves tone only."),
-                HumanMessage(content=enhance_prompt)
-            ])
-            # Create a new state with the enhanced message replacing the last one
-            new_messages = list(state["messages"][:-1]) + [AIMessage(content=enhanced.content)]
-            return {"messages": new_messages}
-        except Exception:
-            return state
+            return await self.achat(message, history, thread_id)
+        finally:
+            await self.api_client.aclose()
     
-    def chat(self, message: str, history: list) -> str:
+    async def achat(self, message: str, history: list, thread_id: str = "default_thread") -> str:
         """Main chat interface using centralized message normalization."""
-        # Convert Gradio history into LangChain messages using centralized utility
-        messages = MessageNormalizer.normalize_gradio_history(history)
+        graph_input, config = await self._prepare_run(message, history, thread_id)
         
-        # Add the new user message
-        messages.append(HumanMessage(content=message))
+        # Run through graph
+        result = await self.graph.ainvoke(graph_input, config=config)
         
+        # A run paused for confirmation replies with the question it is waiting on
+        pending_prompt = await self._pending_prompt(config)
+        if pending_prompt is not None:
+            return pending_prompt
+        
+        # Get the assistant's reply
+        reply = result["messages"][-1].content
+        return reply
+    
+    async def astream(self, message: str, history: list, thread_id: str = "default_thread") -> AsyncIterator[str]:
+        """Stream the assistant's reply token by token as it is generated."""
+        graph_input, config = await self._prepare_run(message, history, thread_id)
+        
+        streamed = False
+        final_state = None
+        # "messages" carries LLM tokens as they are generated, "values" the state after each step
+        async for mode, payload in self.graph.astream(graph_input, config=config, stream_mode=["messages", "values"]):
+            if mode == "values":
+                final_state = payload
+                continue
+            chunk, metadata = payload
+            # Only token chunks from the final user-visible nodes are worth showing;
+            # whole messages returned by nodes arrive through the final state
+            if not isinstance(chunk, AIMessageChunk) or metadata.get("langgraph_node") not in STREAMED_NODES:
+                continue
+            if chunk.content:
+                streamed = True
+                yield chunk.content
+        
+        # The question of a run paused for confirmation is never streamed as tokens
+        pending_prompt = await self._pending_prompt(config)
+        if pending_prompt is not None:
+            yield ("\n\n" if streamed else "") + pending_prompt
+        # Branches that end without an LLM call (e.g. a failed enhancement) still need a reply
+        elif not streamed and final_state and final_state.get("messages"):
+            yield final_state["messages"][-1].content
+    
+    async def _pending_prompt(self, config: dict) -> Optional[str]:
+        """Return the question of the interrupt the thread is waiting on, if any."""
+        state = await self.graph.aget_state(config)
+        for task in state.tasks:
+            for pending in task.interrupts:
+                return pending.value["question"]
+        return None
+    
+    async def _prepare_run(self, message: str, history: list, thread_id: str) -> tuple:
+        """Build the graph input and run config for a single chat turn."""
         # Create config with thread_id for conversation persistence
         config = {
-            "configurable": {
-                "thread_id": "default_thread",  # Use a default thread ID
-                "base_store": self.memory.get_base_store(),
-                "token": None,  # Will be set after login
-                "user_uuid": Config.USER_UUID,
-                "project_uuid": Config.PROJECT_UUID,
-                "community_uuid": Config.COMMUNITY_UUID,
-                "space_uuid": Config.SPACE_UUID,
-            },
-            "recursion_limit": Config.RECURSION_LIMIT
+            **self._base_config,
+            "configurable": {**self._base_config["configurable"], "thread_id": thread_id}
         }
         
         # Add LangSmith metadata if enabled
         if self.langsmith_enabled:
-            config["metadata"] = {
-                "run_name": create_run_name(message),
-                "user_id": Config.USER_UUID,
-                "project": Config.LANGSMITH_PROJECT,
-                "conversation_type": "smart_home_assistant"
-            }
+            config["metadata"] = {**self._base_metadata, "run_name": create_run_name(message)}
         
-        # Run through graph
-        result = self.graph.invoke({"messages": messages}, config=config)
+        # Bound how many conversations the checkpointer keeps
+        self.memory.touch_thread(thread_id)
         
-        # Get the assistant's reply
-        reply = result["messages"][-1].content
-        return reply
+        # The checkpointer already holds this thread's history, so only the new message is sent.
+        # An empty history means the chat was cleared (or is new): reseed the thread from it.
+        state = await self.graph.aget_state(config)
+        if history and state.values.get("messages"):
+            # A reply to a pending confirmation resumes the paused run instead of starting a new one
+            if any(task.interrupts for task in state.tasks):
+                return Command(resume=message), config
+            return {"messages": [HumanMessage(content=message)]}, config
+        
+        await self.memory.get_memory_saver().adelete_thread(thread_id)
+        
+        # Convert Gradio history into LangChain messages using centralized utility
+        messages = MessageNormalizer.normalize_gradio_history(history)
+        
+        # Add the new user message
+        messages.append(HumanMessage(content=message))
+        
+        return {"messages": messages}, config
 
 # Export function for LangGraph Studio
+@lru_cache(maxsize=1)
+def get_chatbot() -> RagentChatbot:
+    """Return the process-wide chatbot, creating it on first use."""
+    return RagentChatbot()
+
 def get_compiled_graph():
     """Export function for LangGraph Studio to access the compiled graph."""
-    chatbot = RagentChatbot()
-    return chatbot.graph
+    return get_chatbot().graph
 
 # For direct execution
 if __name__ == "__main__":
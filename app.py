@@ -4,21 +4,22 @@ Gradio interface for the smart home chatbot.
 """
 
 import gradio as gr
-from agent import RagentChatbot
+from agent import get_chatbot
 from utils.logger import get_logger
 
-# Initialize chatbot instance
-chatbot = RagentChatbot()
 logger = get_logger(__name__)
 
-def chat_fn(message, history):
-    """Chat function for Gradio interface."""
-    return chatbot.chat(message, history)
+async def chat_fn(message, history, session_id):
+    """Chat function for Gradio interface, yielding the reply in chunks as it is generated."""
+    # Each browser session gets its own checkpointed conversation thread
+    async for chunk in get_chatbot().astream(message, history, thread_id=session_id):
+        yield chunk
 
 def re_login():
     """Re-login to refresh access token."""
     try:
         logger.info("🔄 Re-login button clicked - attempting to refresh access token...")
+        chatbot = get_chatbot()
         success = chatbot.refresh_token()
         if success:
             logger.info("✅ Access token refreshed successfully")
@@ -36,6 +37,7 @@ def check_token():
     """Check if the current token is valid."""
     try:
         logger.info("🔍 Check token button clicked - checking token validity...")
+        chatbot = get_chatbot()
         is_valid = chatbot.check_token_validity()
         if is_valid:
             logger.info("✅ Token is valid")
@@ -52,6 +54,8 @@ def check_token():
 def main():
     """Main application function."""
     logger.info("Initializing Gradio interface...")
+    # Built once per process on first use and shared by every session
+    chatbot = get_chatbot()
     with gr.Blocks(title="Smart Home Assistant") as demo:
         gr.Markdown("# 🏠 Smart Home Assistant")
         gr.Markdown("Your intelligent IoT assistant. Control devices, schedule actions, and get help with your smart home!")
@@ -103,14 +107,19 @@ def main():
         )
         
         # Event handlers
-        def respond(message, history):
+        async def respond(message, history, request: gr.Request):
             if message.strip() == "":
-                return history, ""
+                yield history, ""
+                return
             
-            response = chat_fn(message, history)
+            previous_history = list(history)
             history.append({"role": "user", "content": message})
-            history.append({"role": "assistant", "content": response})
-            return history, ""
+            history.append({"role": "assistant", "content": ""})
+            yield history, ""
+            
+            async for chunk in chat_fn(message, previous_history, request.session_hash):
+                history[-1]["content"] += chunk
+                yield history, ""
         
         def clear_chat():
             return []
@@ -146,7 +155,7 @@ def main():
         )
         
         logger.info("All event handlers set up successfully")
-
+    
     return demo
 
 if __name__ == "__main__":
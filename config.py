@@ -7,26 +7,121 @@ import os
 from dotenv import load_dotenv
 from typing import Optional
 
-# Load environment variables
-load_dotenv(dotenv_path=".env", override=True)
+# Set once .env has been applied; inherited by child processes so they skip the parse
+_DOTENV_MARKER = "RAGENT_DOTENV_LOADED"
 
-class Config:
-    """Configuration class for the chatbot application."""
-    
+def load_environment() -> None:
+    """Apply .env to the process environment, at most once per process tree."""
+    if os.environ.get(_DOTENV_MARKER):
+        return
+    load_dotenv(dotenv_path=".env", override=True)
+    os.environ[_DOTENV_MARKER] = "1"
+
+def _to_bool(raw: str) -> bool:
+    """Parse an environment flag."""
+    return raw.lower() == "true"
+
+# Environment-driven settings: name -> (parser, default used when the variable is unset).
+# Nothing is read at import; _ConfigMeta resolves each one on first access.
+_ENV_MAP = {
     # Model Configuration
-    MODEL_NAME = "qwen-plus-2025-04-28"
-    QWEN_API_KEY = os.getenv("QWEN_API_KEY")
+    "QWEN_API_KEY": (str, None),
+    
+    # OpenAI-compatible serving endpoint (e.g. vLLM started with
+    # --max-num-seqs 32 --enable-chunked-prefill). When set, the LLM is served
+    # from there so concurrent requests are batched on the GPU.
+    "LLM_BASE_URL": (str, None),
+    "LLM_SERVED_MODEL": (str, "Qwen/Qwen2.5-7B-Instruct"),
+    "LLM_API_KEY": (str, "EMPTY"),
+    
+    # Small model for light-weight rewriting (response enhancement). Served from
+    # SMALL_LLM_BASE_URL (e.g. Ollama at http://localhost:11434/v1) when set.
+    "SMALL_MODEL_NAME": (str, "qwen-turbo"),
+    "SMALL_LLM_BASE_URL": (str, None),
+    "SMALL_LLM_SERVED_MODEL": (str, "qwen2.5:3b-instruct-q4_K_M"),
     
     # API Keys
-    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-    LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
-    LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "ragent-chatbot")
-    LANGSMITH_ENDPOINT = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
+    "TAVILY_API_KEY": (str, None),
+    "LANGSMITH_API_KEY": (str, None),
+    "LANGSMITH_PROJECT": (str, "ragent-chatbot"),
+    "LANGSMITH_ENDPOINT": (str, "https://api.smith.langchain.com"),
+    
+    # Syncrow API credentials
+    "EMAIL": (str, None),
+    "PASSWORD": (str, None),
+    
+    # Database Configuration (if needed)
+    "SQL_DATABASE": (str, None),
+    "SQL_USER": (str, None),
+    "SQL_HOST": (str, None),
+    "SQL_PASSWORD": (str, None),
+    "SQL_PORT": (str, None),
+    
+    # Structured-output method for intent detection ("json_schema" for native
+    # schema-constrained decoding, "function_calling" for endpoints without it)
+    "INTENT_OUTPUT_METHOD": (str, "json_schema"),
+    
+    # Response enhancement: replies shorter than ENHANCE_MIN_CHARS skip the rewrite,
+    # and up to ENHANCE_CACHE_SIZE rewrites of recurring replies are reused
+    "ENHANCE_MIN_CHARS": (int, "40"),
+    "ENHANCE_CACHE_SIZE": (int, "256"),
+    
+    # Chat history sent to the tool-calling agent
+    "CHAT_HISTORY_MAX_TOKENS": (int, "2048"),
+    "CHAT_HISTORY_MAX_TURNS": (int, "12"),
+    
+    # Logging Configuration
+    "LOG_LEVEL": (str, "INFO"),
+    "LOG_FILE": (str, "logs/ragent_chatbot.log"),
+    "LOG_STRUCTURED": (_to_bool, "false"),
+    "LOG_COLORED": (_to_bool, "true"),
+    
+    # Performance Configuration
+    "ENABLE_CACHING": (_to_bool, "true"),
+    "CACHE_TTL": (int, "300"),  # 5 minutes default
+    "ENABLE_ASYNC": (_to_bool, "true"),
+    "DEVICE_CACHE_TTL": (float, "30"),  # seconds a space's device list is reused
+    "STATUS_CACHE_TTL": (float, "2"),  # seconds a device status reading is reused
+    "FUNCTIONS_CACHE_TTL": (float, "300"),  # seconds a device's function schema is reused
+    "CHECKPOINT_MAX_THREADS": (int, "256"),  # conversation threads kept in the checkpointer
+    
+    # API Configuration
+    "API_TIMEOUT": (int, "30"),  # 30 seconds default
+    "API_RETRY_ATTEMPTS": (int, "3"),
+    "API_RETRY_DELAY": (float, "1.0"),  # 1 second default
+    
+    # Redis Configuration (for caching)
+    "REDIS_HOST": (str, "localhost"),
+    "REDIS_PORT": (int, "6379"),
+    "REDIS_DB": (int, "0"),
+    "REDIS_PASSWORD": (str, None),
+}
+
+class _ConfigMeta(type):
+    """Resolves environment-driven Config attributes on first read and memoizes them."""
+    
+    def __getattr__(cls, name):
+        # Only called for attributes not yet on the class
+        if name not in _ENV_MAP:
+            raise AttributeError(f"type object {cls.__name__!r} has no attribute {name!r}")
+        load_environment()
+        parser, default = _ENV_MAP[name]
+        raw = os.environ.get(name, default)
+        value = parser(raw) if raw is not None else None
+        setattr(cls, name, value)
+        return value
+
+class Config(metaclass=_ConfigMeta):
+    """Configuration class for the chatbot application.
+    
+    Settings listed in _ENV_MAP are read from the environment on first access.
+    """
+    
+    # Model Configuration
+    MODEL_NAME = "qwen-plus-2025-04-28"
     
     # Syncrow API Configuration
     BASE_URL = "https://syncrow-stg.azurewebsites.net"
-    EMAIL = os.getenv("EMAIL")
-    PASSWORD = os.getenv("PASSWORD")
     
     # Project UUIDs
     PROJECT_UUID = "fb8777fc-58e1-4cc9-9dce-f20d39c291db"
@@ -34,13 +129,6 @@ class Config:
     SPACE_UUID = "513aaeed-9a35-4729-be6b-66576f82142e"
     USER_UUID = "2a68c91d-2c63-4828-8dad-87b2b4f69395"
     
-    # Database Configuration (if needed)
-    SQL_DATABASE = os.getenv("SQL_DATABASE")
-    SQL_USER = os.getenv("SQL_USER")
-    SQL_HOST = os.getenv("SQL_HOST")
-    SQL_PASSWORD = os.getenv("SQL_PASSWORD")
-    SQL_PORT = os.getenv("SQL_PORT")
-    
     # File Paths
     CSV_PATH = os.path.join(os.path.dirname(__file__), "data", "device_mappings.csv")
     
@@ -52,48 +140,27 @@ class Config:
     # Graph Configuration
     RECURSION_LIMIT = 7
     
-    # Logging Configuration
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FILE = os.getenv("LOG_FILE", "logs/ragent_chatbot.log")
-    LOG_STRUCTURED = os.getenv("LOG_STRUCTURED", "false").lower() == "true"
-    LOG_COLORED = os.getenv("LOG_COLORED", "true").lower() == "true"
-    
-    # Performance Configuration
-    ENABLE_CACHING = os.getenv("ENABLE_CACHING", "true").lower() == "true"
-    CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))  # 5 minutes default
-    ENABLE_ASYNC = os.getenv("ENABLE_ASYNC", "true").lower() == "true"
-    
-    # API Configuration
-    API_TIMEOUT = int(os.getenv("API_TIMEOUT", "30"))  # 30 seconds default
-    API_RETRY_ATTEMPTS = int(os.getenv("API_RETRY_ATTEMPTS", "3"))
-    API_RETRY_DELAY = float(os.getenv("API_RETRY_DELAY", "1.0"))  # 1 second default
-    
-    # Redis Configuration (for caching)
-    REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
-    REDIS_DB = int(os.getenv("REDIS_DB", "0"))
-    REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+    # Settings that must be present; any one name in a group satisfies it
+    _REQUIRED = (
+        ("QWEN_API_KEY", "LLM_BASE_URL"),
+        ("TAVILY_API_KEY",),
+        ("EMAIL",),
+        ("PASSWORD",),
+    )
+    _OPTIONAL = ("LANGSMITH_API_KEY",)
     
     @classmethod
     def validate(cls) -> bool:
         """Validate that all required configuration is present."""
-        required_vars = [
-            cls.QWEN_API_KEY,
-            cls.TAVILY_API_KEY,
-            cls.EMAIL,
-            cls.PASSWORD,
-        ]
-        
-        optional_vars = [
-            cls.LANGSMITH_API_KEY,
+        missing_vars = [
+            " or ".join(names) for names in cls._REQUIRED
+            if not any(getattr(cls, name) for name in names)
         ]
-        
-        missing_vars = [var for var in required_vars if not var]
         if missing_vars:
             print(f"Missing required environment variables: {missing_vars}")
             return False
         
-        missing_optional = [var for var in optional_vars if not var]
+        missing_optional = [name for name in cls._OPTIONAL if not getattr(cls, name)]
         if missing_optional:
             print(f"Missing optional environment variables (LangSmith will be disabled): {missing_optional}")
         
@@ -4,15 +4,24 @@ Provides environment-specific configurations, validation, and runtime updates.
 """
 
 import os
-import json
+import orjson
 import yaml
 from typing import Any, Dict, Optional, Union, List
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from collections import deque
+from functools import lru_cache
+from dataclasses import dataclass, fields, is_dataclass, replace
 from enum import Enum
-from config import Config
+from threading import Lock
+from config import Config, load_environment
 from utils.logger import get_logger
 
+# libyaml's C parser and emitter when available, otherwise the pure-Python ones
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 
 class Environment(Enum):
     """Application environments."""
@@ -22,7 +31,17 @@ class Environment(Enum):
     TESTING = "testing"
 
 
-@dataclass
+# Integer tags for the environments, used for the per-call checks and table lookups
+_DEV, _STAGING, _PROD, _TEST = 0, 1, 2, 3
+_ENV_TAGS = {
+    Environment.DEVELOPMENT: _DEV,
+    Environment.STAGING: _STAGING,
+    Environment.PRODUCTION: _PROD,
+    Environment.TESTING: _TEST,
+}
+
+
+@dataclass(slots=True, frozen=True)
 class DatabaseConfig:
     """Database configuration."""
     host: str
@@ -35,7 +54,7 @@ class DatabaseConfig:
     max_overflow: int = 20
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class APIConfig:
     """API configuration."""
     timeout: int
@@ -45,7 +64,7 @@ class APIConfig:
     rate_limit_window: int = 60
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CacheConfig:
     """Cache configuration."""
     enabled: bool
@@ -57,7 +76,7 @@ class CacheConfig:
     redis_password: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LoggingConfig:
     """Logging configuration."""
     level: str
@@ -68,7 +87,7 @@ class LoggingConfig:
     backup_count: int = 5
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LLMConfig:
     """LLM configuration."""
     model_name: str
@@ -79,7 +98,7 @@ class LLMConfig:
     temperature: float = 0.7
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SecurityConfig:
     """Security configuration."""
     secret_key: str
@@ -89,7 +108,7 @@ class SecurityConfig:
     lockout_duration: int = 900  # 15 minutes
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PerformanceConfig:
     """Performance configuration."""
     enable_async: bool
@@ -99,12 +118,133 @@ class PerformanceConfig:
     enable_compression: bool = True
 
 
+def _to_bool(raw: str) -> bool:
+    """Parse an environment flag the way the rest of the project does."""
+    return raw.lower() == "true"
+
+
+def _to_optional_int(raw: str) -> Optional[int]:
+    """Parse an integer where 0 means unset."""
+    return int(raw) or None
+
+
+_SECTION_CLASSES = {
+    "database": DatabaseConfig,
+    "api": APIConfig,
+    "cache": CacheConfig,
+    "logging": LoggingConfig,
+    "llm": LLMConfig,
+    "security": SecurityConfig,
+    "performance": PerformanceConfig,
+}
+
+# (section, field, environment variable, parser, default used when the variable is unset).
+# A None parser means Config owns the variable; its already-parsed value is reused so the
+# variable is read and converted once per process.
+_ENV_SCHEMA = (
+    # Database
+    ("database", "host", "DB_HOST", str, "localhost"),
+    ("database", "port", "DB_PORT", int, 5432),
+    ("database", "name", "DB_NAME", str, "ragent_chatbot"),
+    ("database", "user", "DB_USER", str, "postgres"),
+    ("database", "password", "DB_PASSWORD", str, ""),
+    ("database", "ssl_mode", "DB_SSL_MODE", str, "prefer"),
+    ("database", "pool_size", "DB_POOL_SIZE", int, 10),
+    ("database", "max_overflow", "DB_MAX_OVERFLOW", int, 20),
+    
+    # API
+    ("api", "timeout", "API_TIMEOUT", None, None),
+    ("api", "retry_attempts", "API_RETRY_ATTEMPTS", None, None),
+    ("api", "retry_delay", "API_RETRY_DELAY", None, None),
+    ("api", "rate_limit", "API_RATE_LIMIT", int, 100),
+    ("api", "rate_limit_window", "API_RATE_LIMIT_WINDOW", int, 60),
+    
+    # Cache
+    ("cache", "enabled", "ENABLE_CACHING", None, None),
+    ("cache", "ttl", "CACHE_TTL", None, None),
+    ("cache", "backend", "CACHE_BACKEND", str, "memory"),
+    ("cache", "redis_host", "REDIS_HOST", None, None),
+    ("cache", "redis_port", "REDIS_PORT", None, None),
+    ("cache", "redis_db", "REDIS_DB", None, None),
+    ("cache", "redis_password", "REDIS_PASSWORD", None, None),
+    
+    # Logging
+    ("logging", "level", "LOG_LEVEL", None, None),
+    ("logging", "file", "LOG_FILE", str, None),
+    ("logging", "structured", "LOG_STRUCTURED", None, None),
+    ("logging", "colored", "LOG_COLORED", None, None),
+    ("logging", "max_file_size", "LOG_MAX_FILE_SIZE", int, 10 * 1024 * 1024),
+    ("logging", "backup_count", "LOG_BACKUP_COUNT", int, 5),
+    
+    # LLM
+    ("llm", "model_name", "LLM_MODEL_NAME", str, "qwen-plus-2025-04-28"),
+    ("llm", "api_key", "QWEN_API_KEY", str, ""),
+    ("llm", "max_tokens", "LLM_MAX_TOKENS", int, 3000),
+    ("llm", "timeout", "LLM_TIMEOUT", _to_optional_int, None),
+    ("llm", "max_retries", "LLM_MAX_RETRIES", int, 2),
+    ("llm", "temperature", "LLM_TEMPERATURE", float, 0.7),
+    
+    # Security
+    ("security", "secret_key", "SECRET_KEY", str, "your-secret-key-here"),
+    ("security", "jwt_expiry", "JWT_EXPIRY", int, 3600),
+    ("security", "password_min_length", "PASSWORD_MIN_LENGTH", int, 8),
+    ("security", "max_login_attempts", "MAX_LOGIN_ATTEMPTS", int, 5),
+    ("security", "lockout_duration", "LOCKOUT_DURATION", int, 900),
+    
+    # Performance
+    ("performance", "enable_async", "ENABLE_ASYNC", None, None),
+    ("performance", "max_workers", "MAX_WORKERS", int, 4),
+    ("performance", "connection_pool_size", "CONNECTION_POOL_SIZE", int, 20),
+    ("performance", "request_timeout", "REQUEST_TIMEOUT", int, 30),
+    ("performance", "enable_compression", "ENABLE_COMPRESSION", _to_bool, True),
+)
+
+
 class ConfigurationManager:
     """Centralized configuration management system."""
     
     _instance = None
     _lock = Lock()
     
+    # Values forced per environment, indexed by environment tag and keyed by dotted path;
+    # callables derive the value from the current one
+    _OVERRIDES = (
+        # _DEV
+        {
+            "logging.level": "DEBUG",
+            "cache.enabled": True,
+            "performance.enable_async": True,
+        },
+        # _STAGING
+        {
+            "logging.level": "INFO",
+            "cache.enabled": True,
+            "cache.backend": "redis",
+        },
+        # _PROD
+        {
+            "logging.level": "WARNING",
+            "cache.enabled": True,
+            "cache.backend": "redis",
+            "performance.enable_async": True,
+        },
+        # _TEST
+        {
+            "logging.level": "ERROR",
+            "cache.enabled": False,
+            "database.name": lambda name: f"{name}_test",
+        },
+    )
+    
+    # Dotted paths that must be set, with the environment variable that supplies each
+    _REQUIRED_FIELDS = (
+        ("llm.api_key", "QWEN_API_KEY"),
+        ("database.host", "DB_HOST"),
+        ("database.name", "DB_NAME"),
+        ("database.user", "DB_USER"),
+        ("database.password", "DB_PASSWORD"),
+    )
+    
     def __new__(cls):
         if cls._instance is None:
             with cls._lock:
@@ -118,8 +258,21 @@ class ConfigurationManager:
         
         self.logger = get_logger(__name__)
         self.environment = self._detect_environment()
+        self._env_tag = _ENV_TAGS[self.environment]
         self._config = {}
         self._config_file = None
+        self._config_mtime = None
+        # Every dotted path -> value, built on first get() and dropped on any change
+        self._flat: Optional[Dict[str, Any]] = None
+        # Files tried in order; the first one that opens and parses wins
+        self._config_candidates = (
+            f"config/{self.environment.value}.yaml",
+            f"config/{self.environment.value}.json",
+            "config/default.yaml",
+            "config/default.json",
+            "config.yaml",
+            "config.json"
+        )
         self._initialized = True
         
         # Load configuration
@@ -137,6 +290,8 @@ class ConfigurationManager:
     
     def _load_configuration(self):
         """Load configuration from various sources."""
+        self._flat = None
+        
         # Load from environment variables first
         self._load_from_env()
         
@@ -153,158 +308,88 @@ class ConfigurationManager:
     
     def _load_from_env(self):
         """Load configuration from environment variables."""
-        self._config = {
-            "environment": self.environment.value,
-            
-            # Database
-            "database": DatabaseConfig(
-                host=os.getenv("DB_HOST", "localhost"),
-                port=int(os.getenv("DB_PORT", "5432")),
-                name=os.getenv("DB_NAME", "ragent_chatbot"),
-                user=os.getenv("DB_USER", "postgres"),
-                password=os.getenv("DB_PASSWORD", ""),
-                ssl_mode=os.getenv("DB_SSL_MODE", "prefer"),
-                pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
-                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20"))
-            ),
-            
-            # API
-            "api": APIConfig(
-                timeout=int(os.getenv("API_TIMEOUT", "30")),
-                retry_attempts=int(os.getenv("API_RETRY_ATTEMPTS", "3")),
-                retry_delay=float(os.getenv("API_RETRY_DELAY", "1.0")),
-                rate_limit=int(os.getenv("API_RATE_LIMIT", "100")),
-                rate_limit_window=int(os.getenv("API_RATE_LIMIT_WINDOW", "60"))
-            ),
-            
-            # Cache
-            "cache": CacheConfig(
-                enabled=os.getenv("ENABLE_CACHING", "true").lower() == "true",
-                ttl=int(os.getenv("CACHE_TTL", "300")),
-                backend=os.getenv("CACHE_BACKEND", "memory"),
-                redis_host=os.getenv("REDIS_HOST", "localhost"),
-                redis_port=int(os.getenv("REDIS_PORT", "6379")),
-                redis_db=int(os.getenv("REDIS_DB", "0")),
-                redis_password=os.getenv("REDIS_PASSWORD")
-            ),
-            
-            # Logging
-            "logging": LoggingConfig(
-                level=os.getenv("LOG_LEVEL", "INFO"),
-                file=os.getenv("LOG_FILE"),
-                structured=os.getenv("LOG_STRUCTURED", "false").lower() == "true",
-                colored=os.getenv("LOG_COLORED", "true").lower() == "true",
-                max_file_size=int(os.getenv("LOG_MAX_FILE_SIZE", str(10 * 1024 * 1024))),
-                backup_count=int(os.getenv("LOG_BACKUP_COUNT", "5"))
-            ),
-            
-            # LLM
-            "llm": LLMConfig(
-                model_name=os.getenv("LLM_MODEL_NAME", "qwen-plus-2025-04-28"),
-                api_key=os.getenv("QWEN_API_KEY", ""),
-                max_tokens=int(os.getenv("LLM_MAX_TOKENS", "3000")),
-                timeout=int(os.getenv("LLM_TIMEOUT", "0")) or None,
-                max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
-                temperature=float(os.getenv("LLM_TEMPERATURE", "0.7"))
-            ),
-            
-            # Security
-            "security": SecurityConfig(
-                secret_key=os.getenv("SECRET_KEY", "your-secret-key-here"),
-                jwt_expiry=int(os.getenv("JWT_EXPIRY", "3600")),
-                password_min_length=int(os.getenv("PASSWORD_MIN_LENGTH", "8")),
-                max_login_attempts=int(os.getenv("MAX_LOGIN_ATTEMPTS", "5")),
-                lockout_duration=int(os.getenv("LOCKOUT_DURATION", "900"))
-            ),
-            
-            # Performance
-            "performance": PerformanceConfig(
-                enable_async=os.getenv("ENABLE_ASYNC", "true").lower() == "true",
-                max_workers=int(os.getenv("MAX_WORKERS", "4")),
-                connection_pool_size=int(os.getenv("CONNECTION_POOL_SIZE", "20")),
-                request_timeout=int(os.getenv("REQUEST_TIMEOUT", "30")),
-                enable_compression=os.getenv("ENABLE_COMPRESSION", "true").lower() == "true"
-            )
-        }
+        load_environment()
+        
+        # One pass over the schema; unset variables take the default as-is
+        env = os.environ
+        sections: Dict[str, Dict[str, Any]] = {}
+        for section, field, name, cast, default in _ENV_SCHEMA:
+            if cast is None:
+                value = getattr(Config, name)
+            else:
+                raw = env.get(name)
+                value = cast(raw) if raw is not None else default
+            sections.setdefault(section, {})[field] = value
+        
+        self._config = {"environment": self.environment.value}
+        for section, values in sections.items():
+            self._config[section] = _SECTION_CLASSES[section](**values)
     
     def _load_from_files(self):
         """Load configuration from YAML/JSON files."""
-        config_files = [
-            f"config/{self.environment.value}.yaml",
-            f"config/{self.environment.value}.json",
-            "config/default.yaml",
-            "config/default.json",
-            "config.yaml",
-            "config.json"
-        ]
-        
-        for config_file in config_files:
-            if os.path.exists(config_file):
-                try:
-                    with open(config_file, 'r') as f:
-                        if config_file.endswith('.yaml') or config_file.endswith('.yml'):
-                            file_config = yaml.safe_load(f)
-                        else:
-                            file_config = json.load(f)
-                    
-                    self._merge_config(file_config)
-                    self._config_file = config_file
-                    self.logger.info(f"Loaded configuration from {config_file}")
-                    break
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to load configuration from {config_file}: {e}")
+        for config_file in self._config_candidates:
+            # Just try to open each candidate instead of checking for it first; both
+            # parsers take the raw bytes, so the file is never decoded to str here
+            try:
+                with open(config_file, 'rb') as f:
+                    content = f.read()
+                    mtime = os.fstat(f.fileno()).st_mtime
+            except FileNotFoundError:
+                continue
+            
+            try:
+                if config_file.endswith('.yaml') or config_file.endswith('.yml'):
+                    file_config = yaml.load(content, Loader=SafeLoader)
+                else:
+                    file_config = orjson.loads(content)
+                
+                self._merge_config(file_config)
+                self._config_file = config_file
+                self._config_mtime = mtime
+                self.logger.info(f"Loaded configuration from {config_file}")
+                break
+                
+            except Exception as e:
+                self.logger.error(f"Failed to load configuration from {config_file}: {e}")
     
     def _merge_config(self, file_config: Dict[str, Any]):
-        """Merge file configuration with existing config."""
-        for section, values in file_config.items():
-            if section in self._config and isinstance(self._config[section], dict):
-                self._config[section].update(values)
-            else:
-                self._config[section] = values
+        """Deep-merge file configuration into the existing config."""
+        # Worklist of (destination, source) mappings: nested dicts merge key by key,
+        # dataclass sections take the file's values for their fields, anything else is replaced
+        pending = deque([(self._config, file_config)])
+        while pending:
+            target, source = pending.pop()
+            for key, value in source.items():
+                current = target.get(key)
+                if value is current:
+                    continue
+                if isinstance(value, dict) and isinstance(current, dict):
+                    pending.append((current, value))
+                elif isinstance(value, dict) and is_dataclass(current):
+                    known = {f.name for f in fields(current)}
+                    unknown = value.keys() - known
+                    if unknown:
+                        self.logger.warning(f"Ignoring unknown keys in configuration section '{key}': {sorted(unknown)}")
+                    target[key] = replace(current, **{k: v for k, v in value.items() if k in known})
+                else:
+                    target[key] = value
     
     def _apply_environment_overrides(self):
         """Apply environment-specific configuration overrides."""
-        if self.environment == Environment.DEVELOPMENT:
-            # Development overrides
-            self._config["logging"]["level"] = "DEBUG"
-            self._config["cache"]["enabled"] = True
-            self._config["performance"]["enable_async"] = True
-            
-        elif self.environment == Environment.STAGING:
-            # Staging overrides
-            self._config["logging"]["level"] = "INFO"
-            self._config["cache"]["enabled"] = True
-            self._config["cache"]["backend"] = "redis"
-            
-        elif self.environment == Environment.PRODUCTION:
-            # Production overrides
-            self._config["logging"]["level"] = "WARNING"
-            self._config["cache"]["enabled"] = True
-            self._config["cache"]["backend"] = "redis"
-            self._config["performance"]["enable_async"] = True
-            
-        elif self.environment == Environment.TESTING:
-            # Testing overrides
-            self._config["logging"]["level"] = "ERROR"
-            self._config["cache"]["enabled"] = False
-            self._config["database"]["name"] = f"{self._config['database']['name']}_test"
+        for path, value in self._OVERRIDES[self._env_tag].items():
+            if callable(value):
+                value = value(self._get_nested_value(path))
+            self._set_value(path, value)
     
     def _validate_configuration(self):
         """Validate the configuration."""
-        required_fields = [
-            ("llm.api_key", "QWEN_API_KEY"),
-            ("database.host", "DB_HOST"),
-            ("database.name", "DB_NAME"),
-            ("database.user", "DB_USER"),
-            ("database.password", "DB_PASSWORD")
+        flat = self._get_flat()
+        missing_fields = [
+            f"{field_path} (from {env_var})"
+            for field_path, env_var in self._REQUIRED_FIELDS
+            if not flat.get(field_path)
         ]
         
-        missing_fields = []
-        for field_path, env_var in required_fields:
-            if not self._get_nested_value(field_path):
-                missing_fields.append(f"{field_path} (from {env_var})")
-        
         if missing_fields:
             raise ValueError(f"Missing required configuration fields: {', '.join(missing_fields)}")
         
@@ -318,14 +403,34 @@ class ConfigurationManager:
         for key in keys:
             if isinstance(value, dict) and key in value:
                 value = value[key]
+            elif is_dataclass(value) and hasattr(value, key):
+                value = getattr(value, key)
             else:
                 return None
         
         return value
     
+    def _flatten(self, value: Any, prefix: str, flat: Dict[str, Any]) -> None:
+        """Record value under prefix and recurse into dict and dataclass sections."""
+        if prefix:
+            flat[prefix] = value
+        if is_dataclass(value):
+            value = {f.name: getattr(value, f.name) for f in fields(value)}
+        if isinstance(value, dict):
+            for key, child in value.items():
+                self._flatten(child, f"{prefix}.{key}" if prefix else str(key), flat)
+    
+    def _get_flat(self) -> Dict[str, Any]:
+        """Return the dotted-path index, rebuilding it if the configuration changed."""
+        if self._flat is None:
+            flat = {}
+            self._flatten(self._config, "", flat)
+            self._flat = flat
+        return self._flat
+    
     def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value."""
-        return self._get_nested_value(key) or default
+        return self._get_flat().get(key) or default
     
     def get_section(self, section: str) -> Dict[str, Any]:
         """Get an entire configuration section."""
@@ -333,30 +438,49 @@ class ConfigurationManager:
     
     def set(self, key: str, value: Any) -> None:
         """Set a configuration value at runtime."""
+        self._set_value(key, value)
+        self.logger.info(f"Configuration updated: {key} = {value}")
+    
+    def _set_value(self, key: str, value: Any) -> None:
+        """Set a value by dotted path; frozen dataclass sections are replaced with an updated copy."""
+        self._flat = None
         keys = key.split('.')
         config = self._config
         
-        for key_part in keys[:-1]:
+        for i, key_part in enumerate(keys[:-1]):
+            if is_dataclass(config.get(key_part)) and i == len(keys) - 2:
+                config[key_part] = replace(config[key_part], **{keys[-1]: value})
+                return
             if key_part not in config:
                 config[key_part] = {}
             config = config[key_part]
         
         config[keys[-1]] = value
-        self.logger.info(f"Configuration updated: {key} = {value}")
     
     def reload(self) -> None:
-        """Reload configuration from files."""
+        """Reload configuration from files, unless the loaded file is unchanged."""
+        if self._config_file:
+            try:
+                if os.stat(self._config_file).st_mtime == self._config_mtime:
+                    self.logger.debug(f"Configuration file {self._config_file} unchanged, skipping reload")
+                    return
+            except FileNotFoundError:
+                pass
+        
         self.logger.info("Reloading configuration...")
+        self._config_file = None
+        self._config_mtime = None
         self._load_configuration()
     
     def save_to_file(self, file_path: str) -> None:
         """Save current configuration to a file."""
         try:
-            with open(file_path, 'w') as f:
-                if file_path.endswith('.yaml') or file_path.endswith('.yml'):
-                    yaml.dump(self._config, f, default_flow_style=False)
-                else:
-                    json.dump(self._config, f, indent=2)
+            if file_path.endswith('.yaml') or file_path.endswith('.yml'):
+                with open(file_path, 'w') as f:
+                    yaml.dump(self.to_dict(), f, Dumper=SafeDumper, default_flow_style=False)
+            else:
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
             
             self.logger.info(f"Configuration saved to {file_path}")
         except Exception as e:
@@ -368,15 +492,15 @@ class ConfigurationManager:
     
     def is_development(self) -> bool:
         """Check if running in development environment."""
-        return self.environment == Environment.DEVELOPMENT
+        return self._env_tag == _DEV
     
     def is_production(self) -> bool:
         """Check if running in production environment."""
-        return self.environment == Environment.PRODUCTION
+        return self._env_tag == _PROD
     
     def is_testing(self) -> bool:
         """Check if running in testing environment."""
-        return self.environment == Environment.TESTING
+        return self._env_tag == _TEST
     
     def get_database_url(self) -> str:
         """Get the database URL."""
@@ -394,47 +518,58 @@ class ConfigurationManager:
         """Convert configuration to dictionary."""
         result = {}
         for key, value in self._config.items():
-            if hasattr(value, '__dict__'):
-                result[key] = asdict(value)
+            if is_dataclass(value):
+                # Sections hold only scalars, so a field read is enough; asdict() would deep-copy
+                result[key] = {f.name: getattr(value, f.name) for f in fields(value)}
             else:
                 result[key] = value
         return result
 
 
-# Global configuration manager instance
-config_manager = ConfigurationManager()
+@lru_cache(maxsize=1)
+def get_config_manager() -> ConfigurationManager:
+    """Return the global configuration manager, loading the configuration on first use."""
+    return ConfigurationManager()
+
+
+def __getattr__(name: str) -> Any:
+    """Create `config_manager` when it is first accessed rather than at import time."""
+    if name == "config_manager":
+        return get_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Convenience functions
 def get_config(key: str, default: Any = None) -> Any:
     """Get a configuration value."""
-    return config_manager.get(key, default)
+    return get_config_manager().get(key, default)
 
 
 def get_section(section: str) -> Dict[str, Any]:
     """Get a configuration section."""
-    return config_manager.get_section(section)
+    return get_config_manager().get_section(section)
 
 
 def set_config(key: str, value: Any) -> None:
     """Set a configuration value."""
-    config_manager.set(key, value)
+    get_config_manager().set(key, value)
 
 
 def reload_config() -> None:
     """Reload configuration."""
-    config_manager.reload()
+    get_config_manager().reload()
 
 
 def is_development() -> bool:
     """Check if running in development."""
-    return config_manager.is_development()
+    return get_config_manager().is_development()
 
 
 def is_production() -> bool:
     """Check if running in production."""
-    return config_manager.is_production()
+    return get_config_manager().is_production()
 
 
 def is_testing() -> bool:
     """Check if running in testing."""
-    return config_manager.is_testing()
+    return get_config_manager().is_testing()
@@ -3,84 +3,269 @@ API client for Syncrow IoT platform.
 Thin wrapper around the Syncrow API endpoints with comprehensive logging.
 """
 
-import requests
+import asyncio
+import atexit
+import httpx
+import orjson
 import time
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
 from config import Config
+from domain.resilience import RETRY_STATUSES, CircuitBreaker, CircuitOpenError, backoff_delay, retry_attempts
 from utils.logger import get_logger, log_api_call
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 multiplexing in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+@lru_cache(maxsize=256)
+def _encode_batch_body(operation_type: str, devices_uuids: Tuple[str, ...], code: str, value_json: bytes) -> bytes:
+    """Serialize a batch control body; repeated commands reuse the encoded bytes."""
+    return orjson.dumps({
+        "operationType": operation_type,
+        "devicesUuid": devices_uuids,
+        "code": code,
+        "value": orjson.loads(value_json),
+    })
+
+def encode_batch_body(operation_type: str, devices_uuids: List[str], code: str, value: Any) -> bytes:
+    """Return the JSON body for a /devices/batch request."""
+    # The value is keyed by its JSON form so unhashable values (lists, dicts) can be cached too
+    return _encode_batch_body(operation_type, tuple(devices_uuids), code, orjson.dumps(value))
+
+def decode_json_body(body: bytes) -> Any:
+    """Decode a JSON response body; an empty body decodes to an empty object so callers can .get() on it."""
+    return orjson.loads(body) if body.strip() else {}
+
 class SyncrowAPIClient:
     """Client for interacting with the Syncrow API."""
     
     def __init__(self):
         self.base_url = Config.BASE_URL
+        # Endpoints without path parameters, built once
+        self._login_url = f"{self.base_url}/authentication/user/login"
+        self._batch_url = f"{self.base_url}/devices/batch"
         self.token = None
         self.logger = get_logger(__name__)
+        # Long-lived connection pool shared by every sync call
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            headers={"accept": "*/*"},
+            http2=HTTP2_AVAILABLE,
+            timeout=Config.API_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+        atexit.register(self._client.close)
+        # device uuid -> (fetched_at, status response), absorbs rapid repeated queries
+        self._status_cache: Dict[str, tuple] = {}
+        # device uuid -> (fetched_at, functions response); a device's schema rarely changes
+        self._functions_cache: Dict[str, tuple] = {}
+        # Fails calls fast while the Syncrow backend keeps erroring; shared by both pools
+        self._breaker = CircuitBreaker()
+        # Shared async connection pool, created lazily for the running event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop = None
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Return the pooled async client, recreating it if the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            # Close the superseded pool on the loop that owns its connections
+            if self._async_client is not None and not self._async_client_loop.is_closed():
+                asyncio.run_coroutine_threadsafe(self._async_client.aclose(), self._async_client_loop)
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._client.headers,
+                http2=HTTP2_AVAILABLE,
+                timeout=Config.API_TIMEOUT,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def _get_fresh(self, cache: Dict[str, tuple], key: str, ttl: float) -> Optional[Dict]:
+        """Return the cached response for key if it is younger than ttl seconds."""
+        cached_entry = cache.get(key)
+        if cached_entry and time.monotonic() - cached_entry[0] < ttl:
+            return cached_entry[1]
+        return None
+    
+    def invalidate_functions(self, device_uuid: Optional[str] = None):
+        """Drop the cached function schema for a device, or for every device."""
+        if device_uuid is None:
+            self._functions_cache.clear()
+        else:
+            self._functions_cache.pop(device_uuid, None)
+    
+    def _set_token(self, token: str):
+        """Store the access token and send it by default from both connection pools."""
+        self.token = token
+        self._client.headers["Authorization"] = f"Bearer {token}"
+        if self._async_client is not None:
+            self._async_client.headers["Authorization"] = f"Bearer {token}"
+    
+    def close(self):
+        """Close the sync connection pool."""
+        self._client.close()
+    
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+    
+    async def aclose(self):
+        """Close the async connection pool if it belongs to the running event loop."""
+        if self._async_client is not None and self._async_client_loop is asyncio.get_running_loop():
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_client_loop = None
+    
+    def _record_outcome(self, response: httpx.Response) -> httpx.Response:
+        """Feed a completed response to the circuit breaker; only server errors count as failures."""
+        if response.status_code >= 500:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+        return response
+    
+    def _request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request on the sync pool through the circuit breaker."""
+        self._breaker.before_call()
+        try:
+            response = self._send(method, url, retry, **kwargs)
+        except httpx.TransportError:
+            self._breaker.record_failure()
+            raise
+        except BaseException:
+            self._breaker.cancel_probe()
+            raise
+        return self._record_outcome(response)
+    
+    async def _arequest(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request on the async pool through the circuit breaker."""
+        self._breaker.before_call()
+        try:
+            response = await self._asend(method, url, retry, **kwargs)
+        except httpx.TransportError:
+            self._breaker.record_failure()
+            raise
+        except BaseException:
+            self._breaker.cancel_probe()
+            raise
+        return self._record_outcome(response)
+    
+    def _send(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request on the sync pool.
+        
+        GETs, and other calls that opt in with retry=True, are retried with backoff on
+        transport errors and transient statuses; the final response or error is passed on.
+        """
+        if retry is None:
+            retry = method == "GET"
+        attempts = retry_attempts(retry)
+        
+        for attempt in range(attempts):
+            try:
+                response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == attempts - 1:
+                    raise
+                retry_after, reason = None, str(e) or type(e).__name__
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                    return response
+                retry_after, reason = response.headers.get("Retry-After"), f"HTTP {response.status_code}"
+            
+            delay = backoff_delay(attempt, retry_after)
+            self.logger.warning(f"{method} {url} failed ({reason}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+    
+    async def _asend(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request on the async pool, with the same retry policy as _send."""
+        if retry is None:
+            retry = method == "GET"
+        attempts = retry_attempts(retry)
+        
+        for attempt in range(attempts):
+            try:
+                response = await self._get_async_client().request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == attempts - 1:
+                    raise
+                retry_after, reason = None, str(e) or type(e).__name__
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                    return response
+                retry_after, reason = response.headers.get("Retry-After"), f"HTTP {response.status_code}"
+            
+            delay = backoff_delay(attempt, retry_after)
+            self.logger.warning(f"{method} {url} failed ({reason}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
     
     def login(self, email: str, password: str) -> Optional[str]:
         """Login to the Syncrow API and return access token."""
-        headers = {
-            "accept": "*/*",
-            "Content-Type": "application/json"
-        }
         body = {
             "email": email,
             "password": password
         }
-        url = f"{self.base_url}/authentication/user/login"
+        url = self._login_url
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Attempting login for user: {email}")
-            response = requests.post(url, headers=headers, json=body, timeout=Config.API_TIMEOUT)
-            response_time = (time.time() - start_time) * 1000
+            response = self._request("POST", url, json=body)
+            response_time = (time.perf_counter() - start_time) * 1000
             
             response.raise_for_status()
-            self.token = response.json()["data"]["accessToken"]
+            self._set_token(decode_json_body(response.content)["data"]["accessToken"])
             
             log_api_call(self.logger, "POST", url, response.status_code, response_time)
             self.logger.info("Login successful")
             return self.token
             
-        except requests.exceptions.RequestException as e:
-            response_time = (time.time() - start_time) * 1000
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Login failed: {e}")
             return None
     
     def batch_control(self, operation_type: str, devices_uuids: List[str], code: str, value: Any) -> Dict:
         """Send batch control commands to devices."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
-        body = {
-            "operationType": operation_type,
-            "devicesUuid": devices_uuids,
-            "code": code,
-            "value": value,
-        }
-        url = f"{self.base_url}/devices/batch"
+        body = encode_batch_body(operation_type, devices_uuids, code, value)
+        url = self._batch_url
         
-        start_time = time.time()
+        # Commanded devices change state, so their cached readings are stale
+        for device_uuid in devices_uuids:
+            self._status_cache.pop(device_uuid, None)
+        
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Batch control: {operation_type} on {len(devices_uuids)} devices")
-            response = requests.post(url, headers=headers, json=body, timeout=Config.API_TIMEOUT)
-            response_time = (time.time() - start_time) * 1000
+            response = self._request("POST", url, content=body, headers=JSON_HEADERS)
+            response_time = (time.perf_counter() - start_time) * 1000
             
             response.raise_for_status()
-            result = response.json()
+            result = decode_json_body(response.content)
             
             log_api_call(self.logger, "POST", url, response.status_code, response_time)
             self.logger.info(f"Batch control successful for {len(devices_uuids)} devices")
             return result
             
-        except requests.exceptions.RequestException as e:
-            response_time = (time.time() - start_time) * 1000
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Batch control failed: {e}")
             return {"error": str(e)}
     
     def add_schedule(self, device_uuid: str, category_name: str, time: str, code: str, value: Any, days: List[str]) -> Dict:
         """Add a schedule for a device."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
         body = {
             "category": category_name,
             "time": time,
@@ -90,103 +275,143 @@ class SyncrowAPIClient:
         url = f"{self.base_url}/schedule/{device_uuid}"
         
         try:
-            response = requests.post(url, headers=headers, json=body)
+            response = self._request("POST", url, json=body)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return decode_json_body(response.content)
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
             print(f"[add_schedule] Error: {e}")
             return {"error": str(e)}
     
     def get_device_functions(self, device_uuid: str) -> Dict:
         """Get available functions for a device."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
+        cached = self._get_fresh(self._functions_cache, device_uuid, Config.FUNCTIONS_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
         url = f"{self.base_url}/devices/{device_uuid}/functions"
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._request("GET", url)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            result = decode_json_body(response.content)
+            self._functions_cache[device_uuid] = (time.monotonic(), result)
+            return result
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
             print(f"[get_device_functions] Error: {e}")
             return {"error": str(e)}
     
+    async def aget_device_functions(self, device_uuid: str) -> Dict:
+        """Get available functions for a device over the shared async pool."""
+        cached = self._get_fresh(self._functions_cache, device_uuid, Config.FUNCTIONS_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = await self._arequest("GET", f"/devices/{device_uuid}/functions")
+            response.raise_for_status()
+            result = decode_json_body(response.content)
+            self._functions_cache[device_uuid] = (time.monotonic(), result)
+            return result
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
+            self.logger.error(f"[aget_device_functions] Error: {e}")
+            return {"error": str(e)}
+    
     def get_status(self, device_uuid: str) -> Dict:
         """Get status of a device."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
+        cached = self._get_fresh(self._status_cache, device_uuid, Config.STATUS_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
         url = f"{self.base_url}/devices/{device_uuid}/functions/status"
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._request("GET", url)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            result = decode_json_body(response.content)
+            self._status_cache[device_uuid] = (time.monotonic(), result)
+            return result
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
             print(f"[get_status] Error: {e}")
             return {"error": str(e)}
     
+    async def aget_status(self, device_uuid: str) -> Dict:
+        """Get status of a device over the shared async pool."""
+        cached = self._get_fresh(self._status_cache, device_uuid, Config.STATUS_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = await self._arequest("GET", f"/devices/{device_uuid}/functions/status")
+            response.raise_for_status()
+            result = decode_json_body(response.content)
+            self._status_cache[device_uuid] = (time.monotonic(), result)
+            return result
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
+            self.logger.error(f"[aget_status] Error: {e}")
+            return {"error": str(e)}
+    
     def get_devices_per_space(self, project_uuid: str, community_uuid: str, space_uuid: str) -> Dict:
         """Get all devices in a specific space."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
         url = f"{self.base_url}/projects/{project_uuid}/communities/{community_uuid}/spaces/{space_uuid}/devices"
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._request("GET", url)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return decode_json_body(response.content)
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
             print(f"[get_devices_per_space] Error: {e}")
             return {"error": str(e), "statusCode": 500, "data": []}
     
-    def trigger_scene(self, scene_uuid: str) -> Dict:
-        """Trigger a scene."""
-        headers = {
-            "accept": "*/*",
-            "Authorization": f"Bearer {self.token}"
-        }
+    def trigger_scene(self, scene_uuid: str, wait_for_result: bool = True) -> Dict:
+        """Trigger a scene.
+        
+        With wait_for_result=False the response body is not decoded and only
+        {"statusCode": <status>} is returned.
+        """
         url = f"{self.base_url}/scene/tap-to-run/{scene_uuid}/trigger"
         
-        start_time = time.time()
+        # A scene may touch any device in the space
+        self._status_cache.clear()
+        
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Triggering scene {scene_uuid}")
-            response = requests.post(url, headers=headers, timeout=Config.API_TIMEOUT)
-            response_time = (time.time() - start_time) * 1000
+            response = self._request("POST", url)
+            response_time = (time.perf_counter() - start_time) * 1000
             
             response.raise_for_status()
-            result = response.json()
+            result = decode_json_body(response.content) if wait_for_result else {"statusCode": response.status_code}
             
             log_api_call(self.logger, "POST", url, response.status_code, response_time)
             self.logger.info(f"Scene {scene_uuid} triggered successfully")
             return result
             
-        except requests.exceptions.RequestException as e:
-            response_time = (time.time() - start_time) * 1000
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Failed to trigger scene {scene_uuid}: {e}")
             return {"error": str(e)}
     
     def get_scenes(self, project_uuid: str, community_uuid: str, space_uuid: str) -> Dict:
         """Get all scenes for a space."""
-        headers = {
-            "accept": "*/*",
-            "Authorization": f"Bearer {self.token}"
-        }
         url = f"{self.base_url}/projects/{project_uuid}/communities/{community_uuid}/spaces/{space_uuid}/scenes?showInHomePage=true"
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Getting scenes for space {space_uuid}")
-            response = requests.get(url, headers=headers, timeout=Config.API_TIMEOUT)
-            response_time = (time.time() - start_time) * 1000
+            response = self._request("GET", url)
+            response_time = (time.perf_counter() - start_time) * 1000
             
             response.raise_for_status()
-            result = response.json()
+            result = decode_json_body(response.content)
             
             log_api_call(self.logger, "GET", url, response.status_code, response_time)
             scene_count = len(result.get('data', []))
             self.logger.info(f"Retrieved {scene_count} scenes for space {space_uuid}")
             return result
             
-        except requests.exceptions.RequestException as e:
-            response_time = (time.time() - start_time) * 1000
+        except (httpx.HTTPError, orjson.JSONDecodeError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "GET", url, None, response_time, str(e))
             self.logger.error(f"Failed to get scenes for space {space_uuid}: {e}")
             return {"error": str(e), "data": []}
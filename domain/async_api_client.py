@@ -5,98 +5,172 @@ Provides async/await support for better performance.
 
 import asyncio
 import aiohttp
+import logging
+import orjson
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from config import Config
+from domain.api_client import JSON_HEADERS, decode_json_body, encode_batch_body
+from domain.resilience import RETRY_STATUSES, CircuitBreaker, CircuitOpenError, backoff_delay, retry_attempts
 from utils.logger import get_logger, log_api_call
 
 
 class AsyncSyncrowAPIClient:
     """Async client for interacting with the Syncrow API."""
     
-    def __init__(self):
+    def __init__(self, concurrency: int = 16):
         self.base_url = Config.BASE_URL
+        # Endpoints without path parameters, built once
+        self._login_url = f"{self.base_url}/authentication/user/login"
+        self._batch_url = f"{self.base_url}/devices/batch"
         self.token = None
         self.session = None
         self.logger = get_logger(__name__)
+        # Most requests a fan-out keeps in flight; matches the connector's per-host limit
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Fails calls fast while the Syncrow backend keeps erroring
+        self._breaker = CircuitBreaker()
+        # device uuid -> (fetched_at, functions response); a device's schema rarely changes
+        self._functions_cache: Dict[str, tuple] = {}
+        self._functions_locks: Dict[str, asyncio.Lock] = {}
+        # GET url -> future of the request currently fetching it
+        self._inflight: Dict[str, asyncio.Future] = {}
     
     async def __aenter__(self):
         """Async context manager entry."""
+        # Keep-alive pool sized for fan-out against the single Syncrow host
+        connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=self.concurrency,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
         self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"accept": "*/*"},
+            json_serialize=lambda obj: orjson.dumps(obj).decode(),
             timeout=aiohttp.ClientTimeout(total=Config.API_TIMEOUT)
         )
+        if self.token:
+            self.session.headers["Authorization"] = f"Bearer {self.token}"
+        self._semaphore = asyncio.Semaphore(self.concurrency)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
+        # The session owns the connector, so closing it releases the pooled sockets too
         if self.session:
             await self.session.close()
+            self.session = None
+    
+    async def _request(self, method: str, url: str, retry: Optional[bool] = None, decode: bool = True, **kwargs) -> Tuple[int, Any]:
+        """Send a request through the circuit breaker and return its status and decoded JSON body."""
+        self._breaker.before_call()
+        try:
+            result = await self._send(method, url, retry, decode, **kwargs)
+        except aiohttp.ClientResponseError as e:
+            # Client errors mean the backend is up and answering
+            if e.status >= 500:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._breaker.record_failure()
+            raise
+        except BaseException:
+            self._breaker.cancel_probe()
+            raise
+        self._breaker.record_success()
+        return result
+    
+    async def _send(self, method: str, url: str, retry: Optional[bool] = None, decode: bool = True, **kwargs) -> Tuple[int, Any]:
+        """Send a request and return its status and decoded JSON body.
+        
+        GETs, and other calls that opt in with retry=True, are retried with backoff on
+        connection errors and transient statuses; any other failure raises as before.
+        With decode=False the body is read (so the connection can be reused) but not parsed.
+        """
+        if retry is None:
+            retry = method == "GET"
+        attempts = retry_attempts(retry)
+        
+        for attempt in range(attempts):
+            retry_after = None
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    if response.status not in RETRY_STATUSES or attempt == attempts - 1:
+                        response.raise_for_status()
+                        body = await response.read()
+                        if not decode:
+                            return response.status, None
+                        try:
+                            return response.status, decode_json_body(body)
+                        except orjson.JSONDecodeError as e:
+                            raise aiohttp.ClientPayloadError(f"Invalid JSON in response from {url}: {e}") from e
+                    retry_after = response.headers.get("Retry-After")
+                    reason = f"HTTP {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == attempts - 1:
+                    raise
+                reason = str(e) or type(e).__name__
+            
+            delay = backoff_delay(attempt, retry_after)
+            self.logger.warning(f"{method} {url} failed ({reason}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
     
     async def login(self, email: str, password: str) -> Optional[str]:
         """Login to the Syncrow API and return access token."""
-        headers = {
-            "accept": "*/*",
-            "Content-Type": "application/json"
-        }
         body = {
             "email": email,
             "password": password
         }
-        url = f"{self.base_url}/authentication/user/login"
+        url = self._login_url
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Attempting async login for user: {email}")
-            async with self.session.post(url, headers=headers, json=body) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                data = await response.json()
-                self.token = data["data"]["accessToken"]
-                
-                log_api_call(self.logger, "POST", url, response.status, response_time)
-                self.logger.info("Async login successful")
-                return self.token
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, data = await self._request("POST", url, json=body)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            self.token = data["data"]["accessToken"]
+            self.session.headers["Authorization"] = f"Bearer {self.token}"
+            
+            log_api_call(self.logger, "POST", url, status, response_time)
+            self.logger.info("Async login successful")
+            return self.token
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Async login failed: {e}")
             return None
     
     async def batch_control(self, operation_type: str, devices_uuids: List[str], code: str, value: Any) -> Dict:
         """Send batch control commands to devices asynchronously."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
-        body = {
-            "operationType": operation_type,
-            "devicesUuid": devices_uuids,
-            "code": code,
-            "value": value,
-        }
-        url = f"{self.base_url}/devices/batch"
+        body = encode_batch_body(operation_type, devices_uuids, code, value)
+        url = self._batch_url
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Async batch control: {operation_type} on {len(devices_uuids)} devices")
-            async with self.session.post(url, headers=headers, json=body) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "POST", url, response.status, response_time)
-                self.logger.info(f"Async batch control successful for {len(devices_uuids)} devices")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, result = await self._request("POST", url, data=body, headers=JSON_HEADERS)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "POST", url, status, response_time)
+            self.logger.info(f"Async batch control successful for {len(devices_uuids)} devices")
+            return result
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Async batch control failed: {e}")
             return {"error": str(e)}
     
     async def add_schedule(self, device_uuid: str, category_name: str, time: str, code: str, value: Any, days: List[str]) -> Dict:
         """Add a schedule for a device asynchronously."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
         body = {
             "category": category_name,
             "time": time,
@@ -105,163 +179,205 @@ class AsyncSyncrowAPIClient:
         }
         url = f"{self.base_url}/schedule/{device_uuid}"
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Adding async schedule for device {device_uuid}: {time} on {days}")
-            async with self.session.post(url, headers=headers, json=body) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "POST", url, response.status, response_time)
-                self.logger.info(f"Async schedule added successfully for device {device_uuid}")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, result = await self._request("POST", url, json=body)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "POST", url, status, response_time)
+            self.logger.info(f"Async schedule added successfully for device {device_uuid}")
+            return result
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Failed to add async schedule for device {device_uuid}: {e}")
             return {"error": str(e)}
     
+    def _get_fresh_functions(self, device_uuid: str) -> Optional[Dict]:
+        """Return the cached function schema for a device if it is still fresh."""
+        cached_entry = self._functions_cache.get(device_uuid)
+        if cached_entry and time.monotonic() - cached_entry[0] < Config.FUNCTIONS_CACHE_TTL:
+            return cached_entry[1]
+        return None
+    
+    def invalidate_functions(self, device_uuid: Optional[str] = None):
+        """Drop the cached function schema for a device, or for every device."""
+        if device_uuid is None:
+            self._functions_cache.clear()
+        else:
+            self._functions_cache.pop(device_uuid, None)
+    
     async def get_device_functions(self, device_uuid: str) -> Dict:
-        """Get available functions for a device asynchronously."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
+        """Get available functions for a device asynchronously, reusing a recent result."""
+        cached = self._get_fresh_functions(device_uuid)
+        if cached is not None:
+            return cached
+        
+        # One fetch per device at a time; callers that queued behind it reuse its result
+        async with self._functions_locks.setdefault(device_uuid, asyncio.Lock()):
+            cached = self._get_fresh_functions(device_uuid)
+            if cached is not None:
+                return cached
+            
+            result = await self._fetch_device_functions(device_uuid)
+            if "error" not in result:
+                self._functions_cache[device_uuid] = (time.monotonic(), result)
+            return result
+    
+    async def _fetch_device_functions(self, device_uuid: str) -> Dict:
+        """Fetch available functions for a device from the API."""
         url = f"{self.base_url}/devices/{device_uuid}/functions"
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.debug(f"Getting async functions for device {device_uuid}")
-            async with self.session.get(url, headers=headers) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "GET", url, response.status, response_time)
+            status, result = await self._request("GET", url)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "GET", url, status, response_time)
+            if self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug(f"Retrieved {len(result.get('data', {}).get('functions', []))} async functions for device {device_uuid}")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            return result
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "GET", url, None, response_time, str(e))
             self.logger.error(f"Failed to get async functions for device {device_uuid}: {e}")
             return {"error": str(e)}
     
+    async def _single_flight(self, url: str, fetch) -> Any:
+        """Await fetch() once for all concurrent callers of the same GET url."""
+        future = self._inflight.get(url)
+        if future is not None:
+            # Shielded so a cancelled waiter does not cancel the shared request
+            return await asyncio.shield(future)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # the caller re-raises it; don't warn when nobody else waited
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[url]
+    
     async def get_status(self, device_uuid: str) -> Dict:
-        """Get status of a device asynchronously."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
+        """Get status of a device asynchronously, sharing the request with concurrent callers."""
         url = f"{self.base_url}/devices/{device_uuid}/functions/status"
-        
-        start_time = time.time()
+        return await self._single_flight(url, lambda: self._fetch_status(device_uuid, url))
+    
+    async def _fetch_status(self, device_uuid: str, url: str) -> Dict:
+        """Fetch the status of a device from the API."""
+        start_time = time.perf_counter()
         try:
             self.logger.debug(f"Getting async status for device {device_uuid}")
-            async with self.session.get(url, headers=headers) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "GET", url, response.status, response_time)
-                self.logger.debug(f"Retrieved async status for device {device_uuid}")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, result = await self._request("GET", url)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "GET", url, status, response_time)
+            self.logger.debug(f"Retrieved async status for device {device_uuid}")
+            return result
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "GET", url, None, response_time, str(e))
             self.logger.error(f"Failed to get async status for device {device_uuid}: {e}")
             return {"error": str(e)}
     
     async def get_devices_per_space(self, project_uuid: str, community_uuid: str, space_uuid: str) -> Dict:
-        """Get all devices in a specific space asynchronously."""
-        headers = {"accept": "*/*", "Authorization": f"Bearer {self.token}"}
+        """Get all devices in a specific space asynchronously, sharing the request with concurrent callers."""
         url = f"{self.base_url}/projects/{project_uuid}/communities/{community_uuid}/spaces/{space_uuid}/devices"
-        
-        start_time = time.time()
+        return await self._single_flight(url, lambda: self._fetch_devices_per_space(space_uuid, url))
+    
+    async def _fetch_devices_per_space(self, space_uuid: str, url: str) -> Dict:
+        """Fetch all devices in a space from the API."""
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Getting async devices for space {space_uuid}")
-            async with self.session.get(url, headers=headers) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "GET", url, response.status, response_time)
-                device_count = len(result.get('data', []))
-                self.logger.info(f"Retrieved {device_count} async devices for space {space_uuid}")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, result = await self._request("GET", url)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "GET", url, status, response_time)
+            device_count = len(result.get('data', []))
+            self.logger.info(f"Retrieved {device_count} async devices for space {space_uuid}")
+            return result
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "GET", url, None, response_time, str(e))
             self.logger.error(f"Failed to get async devices for space {space_uuid}: {e}")
             return {"error": str(e), "statusCode": 500, "data": []}
     
-    async def trigger_scene(self, scene_uuid: str) -> Dict:
-        """Trigger a scene asynchronously."""
-        headers = {
-            "accept": "*/*",
-            "Authorization": f"Bearer {self.token}"
-        }
+    async def trigger_scene(self, scene_uuid: str, wait_for_result: bool = True) -> Dict:
+        """Trigger a scene asynchronously.
+        
+        With wait_for_result=False the response body is not decoded and only
+        {"statusCode": <status>} is returned.
+        """
         url = f"{self.base_url}/scene/tap-to-run/{scene_uuid}/trigger"
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Triggering async scene {scene_uuid}")
-            async with self.session.post(url, headers=headers) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "POST", url, response.status, response_time)
-                self.logger.info(f"Async scene {scene_uuid} triggered successfully")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, result = await self._request("POST", url, decode=wait_for_result)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "POST", url, status, response_time)
+            self.logger.info(f"Async scene {scene_uuid} triggered successfully")
+            return result if wait_for_result else {"statusCode": status}
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "POST", url, None, response_time, str(e))
             self.logger.error(f"Failed to trigger async scene {scene_uuid}: {e}")
             return {"error": str(e)}
     
     async def get_scenes(self, project_uuid: str, community_uuid: str, space_uuid: str) -> Dict:
         """Get all scenes for a space asynchronously."""
-        headers = {
-            "accept": "*/*",
-            "Authorization": f"Bearer {self.token}"
-        }
         url = f"{self.base_url}/projects/{project_uuid}/communities/{community_uuid}/spaces/{space_uuid}/scenes?showInHomePage=true"
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             self.logger.info(f"Getting async scenes for space {space_uuid}")
-            async with self.session.get(url, headers=headers) as response:
-                response_time = (time.time() - start_time) * 1000
-                
-                response.raise_for_status()
-                result = await response.json()
-                
-                log_api_call(self.logger, "GET", url, response.status, response_time)
-                scene_count = len(result.get('data', []))
-                self.logger.info(f"Retrieved {scene_count} async scenes for space {space_uuid}")
-                return result
-                
-        except aiohttp.ClientError as e:
-            response_time = (time.time() - start_time) * 1000
+            status, result = await self._request("GET", url)
+            response_time = (time.perf_counter() - start_time) * 1000
+            
+            log_api_call(self.logger, "GET", url, status, response_time)
+            scene_count = len(result.get('data', []))
+            self.logger.info(f"Retrieved {scene_count} async scenes for space {space_uuid}")
+            return result
+            
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            response_time = (time.perf_counter() - start_time) * 1000
             log_api_call(self.logger, "GET", url, None, response_time, str(e))
             self.logger.error(f"Failed to get async scenes for space {space_uuid}: {e}")
             return {"error": str(e), "data": []}
     
+    async def _gated(self, coro):
+        """Await coro once a concurrency slot is free."""
+        async with self._semaphore:
+            return await coro
+    
     async def batch_control_multiple(self, operations: List[Dict]) -> List[Dict]:
         """Execute multiple batch control operations concurrently."""
         tasks = []
         for operation in operations:
-            task = self.batch_control(
+            task = self._gated(self.batch_control(
                 operation["operation_type"],
                 operation["devices_uuids"],
                 operation["code"],
                 operation["value"]
-            )
+            ))
             tasks.append(task)
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -281,7 +397,7 @@ class AsyncSyncrowAPIClient:
     
     async def get_multiple_device_status(self, device_uuids: List[str]) -> List[Dict]:
         """Get status for multiple devices concurrently."""
-        tasks = [self.get_status(device_uuid) for device_uuid in device_uuids]
+        tasks = [self._gated(self.get_status(device_uuid)) for device_uuid in device_uuids]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Handle exceptions
@@ -3,7 +3,7 @@ Domain objects for the ragent_chatbot project.
 Contains all Pydantic models used throughout the application.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Any, Literal
 from datetime import datetime
 
@@ -91,7 +91,7 @@ class Intent(BaseModel):
     Intent: Literal["control", "query", "schedule", "ambiguous", "high_risk", "conversation", "scene"] = Field(
         description="Classifies user`s command"
     )
-    device_uuid: str = Field(description="The ID of the device commanded by the user.")
+    device_uuid: Optional[str] = Field(default=None, description="The ID of the device commanded by the user.")
     user_message: str = Field(
         description="The instruction related to that specific device ID. For example, if this intent is related only to the TV and the user instruction is Turn on TV and lights then this instruction should be turn on TV. Another example: 'Turn on switch 1 in activate countdown in the 3G switch' should become 2 intents one of them is 'Turn on switch 1 in the 3G switch' and the other 'Activate countdown in the 3G switch'"
     )
@@ -99,6 +99,34 @@ class Intent(BaseModel):
     next_action: str = Field(default=None, description="suggested next step for this intent type")
     confidence: float = Field(default="Represents the percentage to what degree the model is confident about his chosen intent")
     product_type: str = Field(description="The type of the device commanded by the user.")
+    polished_ack: Optional[str] = Field(
+        default=None,
+        description="For query and conversation intents: one short, friendly sentence the assistant can say to the user about this command. For ambiguous intents: one short, friendly question asking for the missing detail. Leave empty otherwise."
+    )
+    tools_needed: Optional[bool] = Field(
+        default=None,
+        description="For conversation intents only: true if answering needs current information from the web (weather, news, search), false for chit-chat or general knowledge. Leave empty otherwise."
+    )
+    code: Optional[str] = Field(
+        default=None,
+        description="For control intents only: the function code to send (e.g. switch_1) when the device capabilities make the command unambiguous. Leave empty otherwise."
+    )
+    value: Optional[Any] = Field(
+        default=None,
+        description="For control intents only: the value for `code` in its native datatype (e.g. true, not 'true'). Leave empty when `code` is empty."
+    )
+    
+    @model_validator(mode="after")
+    def _require_device(self) -> "Intent":
+        """A device command without a resolvable device cannot be executed, so ask the user instead."""
+        if self.device_uuid is None and self.Intent in ("control", "query", "schedule"):
+            self.Intent = "ambiguous"
+            # An acknowledgement written for the original intent would mislead the user
+            self.polished_ack = None
+        return self
+
+class IntentList(BaseModel):
+    intents: list[Intent] = Field(description="One entry per individual command in the user's input")
 
 class DeviceUsageRecord(BaseModel):
     timestamp: datetime = Field(description="The time the device was controlled")
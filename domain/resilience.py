@@ -0,0 +1,102 @@
+"""
+Retry policy and circuit breaker shared by the Syncrow API clients.
+Decides which failures are transient, how long to back off, and when to stop calling a failing backend.
+"""
+
+import random
+import time
+from threading import Lock
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+from config import Config
+
+# Statuses worth another attempt: timeouts, throttling and gateway/availability errors
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Longest a single backoff may wait, in seconds
+MAX_RETRY_DELAY = 30.0
+
+
+def retry_attempts(retry: bool) -> int:
+    """Total attempts for a request: the first try plus the configured retries when retrying."""
+    return 1 + Config.API_RETRY_ATTEMPTS if retry else 1
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retrying after the given zero-based attempt.
+    
+    A Retry-After header (seconds or HTTP date) is honoured when present; otherwise the
+    delay doubles each attempt from API_RETRY_DELAY, capped, with up to one base delay of jitter.
+    """
+    if retry_after:
+        try:
+            return min(MAX_RETRY_DELAY, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                return min(MAX_RETRY_DELAY, max(0.0, (when - datetime.now(timezone.utc)).total_seconds()))
+            except (TypeError, ValueError):
+                pass
+    
+    base = Config.API_RETRY_DELAY
+    return min(MAX_RETRY_DELAY, base * 2 ** attempt) + random.uniform(0, base)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calls to a backend after repeated failures.
+    
+    After failure_threshold consecutive failures the circuit opens and every call is
+    rejected with CircuitOpenError. Once reset_timeout seconds have passed a single probe
+    is let through: success closes the circuit, failure opens it for another window.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_count = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+    
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit open after {self.failure_count} consecutive failures")
+            self._probing = True
+    
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self.failure_count = 0
+            self.opened_at = None
+            self._probing = False
+    
+    def record_failure(self):
+        """Count a failed call, opening the circuit at the threshold or when a probe fails."""
+        with self._lock:
+            self.failure_count += 1
+            if self._probing or self.failure_count >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+    
+    def cancel_probe(self):
+        """Allow a new probe after one ended without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            self._probing = False
@@ -2,7 +2,7 @@
 LLM module for ragent_chatbot.
 """
 
-from .qwen_llm import get_qwen_llm
+from .qwen_llm import get_qwen_llm, get_small_llm
 from .langsmith_config import setup_langsmith, create_run_name, get_langsmith_client
 
-__all__ = ["get_qwen_llm", "setup_langsmith", "create_run_name", "get_langsmith_client"]
+__all__ = ["get_qwen_llm", "get_small_llm", "setup_langsmith", "create_run_name", "get_langsmith_client"]
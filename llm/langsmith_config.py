@@ -3,12 +3,15 @@ LangSmith configuration and setup for tracking and debugging.
 """
 
 import os
+from functools import lru_cache
 from typing import Optional
 from config import Config
 
+@lru_cache(maxsize=1)
 def setup_langsmith() -> bool:
     """
     Setup LangSmith for tracking and debugging.
+    The environment only needs configuring once per process, so repeat calls reuse the result.
     
     Returns:
         bool: True if LangSmith is configured, False otherwise
@@ -50,6 +53,7 @@ def get_langsmith_client():
         print(f"Error getting LangSmith client: {e}")
         return None
 
+@lru_cache(maxsize=256)
 def create_run_name(user_message: str) -> str:
     """
     Create a descriptive run name for LangSmith tracking.
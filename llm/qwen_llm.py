@@ -3,16 +3,33 @@ Qwen LLM configuration and initialization.
 Centralized LLM setup for the ragent_chatbot project.
 """
 
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_qwq import ChatQwQ
 from config import Config
 
-def get_qwen_llm() -> ChatQwQ:
+def get_qwen_llm() -> BaseChatModel:
     """
-    Create and return a configured ChatQwQ instance.
+    Create and return a configured Qwen chat model.
+    
+    When LLM_BASE_URL is set the model is served from that OpenAI-compatible
+    endpoint (vLLM/TGI), which batches concurrent requests from all users into
+    shared decode steps. Otherwise the hosted Qwen API is used.
     
     Returns:
-        ChatQwQ: Configured Qwen LLM instance
+        BaseChatModel: Configured Qwen LLM instance
     """
+    if Config.LLM_BASE_URL:
+        from langchain_openai import ChatOpenAI
+        
+        return ChatOpenAI(
+            base_url=Config.LLM_BASE_URL,
+            api_key=Config.LLM_API_KEY,
+            model=Config.LLM_SERVED_MODEL,
+            max_tokens=Config.MAX_TOKENS,
+            timeout=Config.TIMEOUT,
+            max_retries=Config.MAX_RETRIES,
+        )
+    
     if not Config.QWEN_API_KEY:
         raise ValueError("QWEN_API_KEY not found in environment variables")
     
@@ -23,3 +40,38 @@ def get_qwen_llm() -> ChatQwQ:
         timeout=Config.TIMEOUT,
         max_retries=Config.MAX_RETRIES,
     )
+
+def get_small_llm() -> BaseChatModel:
+    """
+    Create and return a small, fast chat model for tone-only rewriting.
+    
+    Uses SMALL_LLM_BASE_URL (an OpenAI-compatible endpoint such as Ollama
+    serving a quantized 3B model) when set, otherwise the hosted small Qwen model.
+    Deployments with neither a small endpoint nor a Qwen key reuse the main model.
+    
+    Returns:
+        BaseChatModel: Configured small LLM instance
+    """
+    if Config.SMALL_LLM_BASE_URL:
+        from langchain_openai import ChatOpenAI
+        
+        return ChatOpenAI(
+            base_url=Config.SMALL_LLM_BASE_URL,
+            api_key=Config.LLM_API_KEY,
+            model=Config.SMALL_LLM_SERVED_MODEL,
+            max_tokens=Config.MAX_TOKENS,
+            timeout=Config.TIMEOUT,
+            max_retries=Config.MAX_RETRIES,
+        )
+    
+    # Only LLM_BASE_URL is configured (Config.validate accepts that), so rewrite with the main model
+    if not Config.QWEN_API_KEY:
+        return get_qwen_llm()
+    
+    return ChatQwQ(
+        api_key=Config.QWEN_API_KEY,
+        model=Config.SMALL_MODEL_NAME,
+        max_tokens=Config.MAX_TOKENS,
+        timeout=Config.TIMEOUT,
+        max_retries=Config.MAX_RETRIES,
+    )
@@ -2,9 +2,11 @@
 Chat memory management for the ragent_chatbot project.
 """
 
+from collections import OrderedDict
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.store.memory import InMemoryStore
 from typing import Dict, Any
+from config import Config
 
 class ChatMemory:
     """Manages chat memory and storage for the chatbot."""
@@ -12,6 +14,8 @@ class ChatMemory:
     def __init__(self):
         self.memory_saver = MemorySaver()
         self.base_store = InMemoryStore()
+        # Checkpointed thread ids, least recently used first
+        self._threads: OrderedDict = OrderedDict()
     
     def get_memory_saver(self) -> MemorySaver:
         """Get the memory saver instance."""
@@ -21,6 +25,14 @@ class ChatMemory:
         """Get the base store instance."""
         return self.base_store
     
+    def touch_thread(self, thread_id: str):
+        """Mark a thread as used, dropping the checkpoints of the least recently used ones past the limit."""
+        self._threads[thread_id] = None
+        self._threads.move_to_end(thread_id)
+        while len(self._threads) > Config.CHECKPOINT_MAX_THREADS:
+            stale_thread, _ = self._threads.popitem(last=False)
+            self.memory_saver.delete_thread(stale_thread)
+    
     def get_memory_config(self) -> Dict[str, Any]:
         """Get memory configuration for the graph."""
         return {
@@ -16,6 +16,8 @@ class PromptManager:
         self.logger = get_logger(__name__)
         self.prompts_dir = os.path.join(os.path.dirname(__file__))
         self._templates = {}
+        # Formatted text of prompts whose arguments never vary, keyed by (template, args)
+        self._static_prompts = {}
         self._load_all_templates()
     
     def _load_all_templates(self):
@@ -23,7 +25,7 @@ class PromptManager:
         template_files = {
             "intent_detection": {
                 "file": "intent_detection.md",
-                "variables": ["user_message", "available_devices"]
+                "variables": ["user_message", "available_devices", "device_capabilities"]
             },
             "device_control": {
                 "file": "device_control.md", 
@@ -84,12 +86,13 @@ class PromptManager:
             self.logger.error(f"Failed to format template {template_name}: {e}")
             return ""
     
-    def get_intent_detection_prompt(self, user_message: str, available_devices: str) -> str:
+    def get_intent_detection_prompt(self, user_message: str, available_devices: str, device_capabilities: str = "") -> str:
         """Get formatted intent detection prompt."""
         return self.format_prompt(
             "intent_detection",
             user_message=user_message,
-            available_devices=available_devices
+            available_devices=available_devices,
+            device_capabilities=device_capabilities
         )
     
     def get_device_control_prompt(self, user_messages: str, descriptions: str, original_prompt: str = "") -> str:
@@ -134,7 +137,7 @@ class PromptManager:
     
     def get_confirmation_request_prompt(self, action_summary: str, risk_level: str = "high") -> str:
         """Get formatted confirmation request prompt."""
-        return self.format_prompt(
+        return self._format_static_prompt(
             "confirmation_request",
             action_summary=action_summary,
             risk_level=risk_level
@@ -142,7 +145,18 @@ class PromptManager:
     
     def get_agent_system_prompt(self) -> str:
         """Get the agent system prompt."""
-        return self.format_prompt("agent_system")
+        return self._format_static_prompt("agent_system")
+    
+    def _format_static_prompt(self, template_name: str, **kwargs) -> str:
+        """Format a prompt that is called with a small, fixed set of arguments, once per set."""
+        key = (template_name, tuple(sorted(kwargs.items())))
+        prompt = self._static_prompts.get(key)
+        if prompt is None:
+            prompt = self.format_prompt(template_name, **kwargs)
+            # Failed formats return "" and are retried next time
+            if prompt:
+                self._static_prompts[key] = prompt
+        return prompt
     
     def get_chat_prompt_template(self) -> ChatPromptTemplate:
         """Get ChatPromptTemplate for agent usage."""
@@ -159,6 +173,7 @@ class PromptManager:
         """Reload all templates from files."""
         self.logger.info("Reloading prompt templates...")
         self._templates.clear()
+        self._static_prompts.clear()
         self._load_all_templates()
         self.logger.info("Prompt templates reloaded")
 
@@ -167,9 +182,9 @@ class PromptManager:
 prompt_manager = PromptManager()
 
 # Convenience functions
-def get_intent_detection_prompt(user_message: str, available_devices: str) -> str:
+def get_intent_detection_prompt(user_message: str, available_devices: str, device_capabilities: str = "") -> str:
     """Get formatted intent detection prompt."""
-    return prompt_manager.get_intent_detection_prompt(user_message, available_devices)
+    return prompt_manager.get_intent_detection_prompt(user_message, available_devices, device_capabilities)
 
 
 def get_device_control_prompt(user_messages: str, descriptions: str, original_prompt: str = "") -> str:
@@ -8,8 +8,20 @@ import os
 import sys
 import subprocess
 import argparse
+import importlib.util
 from pathlib import Path
 
+# Packages the studio needs, by distribution name
+REQUIRED_PACKAGES = (
+    'langgraph-studio',
+    'langchain',
+    'langchain-core',
+    'gradio',
+    'pandas',
+    'requests',
+    'aiohttp',
+)
+
 def check_python_version():
     """Check if Python version is compatible."""
     if sys.version_info < (3, 8):
@@ -21,23 +33,14 @@ def check_python_version():
 
 def check_dependencies():
     """Check if required dependencies are installed."""
-    required_packages = [
-        'langgraph-studio',
-        'langchain',
-        'langchain-core',
-        'gradio',
-        'pandas',
-        'requests',
-        'aiohttp'
-    ]
-    
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
+    for package in REQUIRED_PACKAGES:
+        # Locate the package without importing it; importing gradio, pandas and
+        # langchain just to check they exist costs seconds
+        if importlib.util.find_spec(package.replace('-', '_')) is not None:
             print(f"✅ {package}")
-        except ImportError:
+        else:
             missing_packages.append(package)
             print(f"❌ {package}")
     
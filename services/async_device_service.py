@@ -24,13 +24,18 @@ class AsyncDeviceService:
     def __init__(self, api_client: AsyncSyncrowAPIClient):
         self.api_client = api_client
         self.llm = get_qwen_llm()
+        # Tool schemas are fixed, so bind each extraction variant once
+        self._llm_control = self.llm.bind_tools(tools=[DeviceFunction], parallel_tool_calls=True)
+        self._llm_schedule = self.llm.bind_tools(tools=[DeviceSchedule], parallel_tool_calls=True)
+        self._llm_scene = self.llm.bind_tools(tools=[Scene])
         self.device_descriptions = pd.read_csv(Config.CSV_PATH)
+        self._descriptions_by_product_type = self._index_device_descriptions(self.device_descriptions)
         self.logger = get_logger(__name__)
     
     @cached("devices_in_space", ttl=300)  # Cache for 5 minutes
     async def get_devices_in_space(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Device]:
         """Get all devices in a specific space asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         devices_json = await self.api_client.get_devices_per_space(project_uuid, community_uuid, space_uuid)
         
@@ -50,7 +55,7 @@ class AsyncDeviceService:
                     tag=device_json["deviceTag"]["name"] if device_json["deviceTag"] else None
                 ))
             
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             log_performance(self.logger, "async_get_devices_in_space", duration, {"device_count": len(devices)})
             self.logger.info(f"Retrieved {len(devices)} devices for space {space_uuid} asynchronously")
             return devices
@@ -58,24 +63,27 @@ class AsyncDeviceService:
             self.logger.warning(f"Failed to fetch devices asynchronously: {devices_json}")
             return []
     
+    @staticmethod
+    def _index_device_descriptions(device_descriptions: pd.DataFrame) -> Dict[str, List[str]]:
+        """Render every CSV row once and group the descriptions by product type."""
+        descriptions_by_product_type: Dict[str, List[str]] = {}
+        for row in device_descriptions.itertuples(index=False):
+            descriptions_by_product_type.setdefault(row.product_type, []).append(f"""
+                "Product Type": {row.product_type},
+                "Code": {row.code},
+                "Code Description": {row.code_description},
+                "Value": {row.value},
+                "Value Description": {row.value_description}
+            """)
+        return descriptions_by_product_type
+    
     def get_device_descriptions(self, product_type: str) -> List[str]:
         """Get device descriptions for a specific product type."""
-        rows = self.device_descriptions[self.device_descriptions["product_type"] == product_type]
-        descriptions = []
-        for row in rows.values:
-            code, code_description, value, value_description, product_type = row
-            descriptions.append(f"""
-                "Product Type": {product_type},
-                "Code": {code},
-                "Code Description": {code_description},
-                "Value": {value},
-                "Value Description": {value_description}
-            """)
-        return descriptions
+        return list(self._descriptions_by_product_type.get(product_type, []))
     
     async def control_device(self, device_uuid: str, user_message: str, product_type: str) -> Dict[str, Any]:
         """Control a device based on user message asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Get device functions (with caching)
         functions_json = await self.api_client.get_device_functions(device_uuid)
@@ -88,7 +96,7 @@ class AsyncDeviceService:
         descriptions = self.get_device_descriptions(product_type)
         
         # Use LLM to determine the correct function and value
-        llm_tool_functions = self.llm.bind_tools(tools=[DeviceFunction], parallel_tool_calls=True)
+        llm_tool_functions = self._llm_control
         
         system_prompt = prompt_manager.get_device_control_prompt(
             str([{"device_uuid": device_uuid, "user_message": user_message, "product_type": product_type}]),
@@ -127,14 +135,14 @@ class AsyncDeviceService:
                     "error": error_msg
                 })
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_control_device", duration, {"device_uuid": device_uuid})
         
         return {"results": results}
     
     async def control_multiple_devices(self, user_messages: List[Dict], devices: List[Device]) -> List[str]:
         """Control multiple devices based on user messages asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Create tasks for concurrent execution
         tasks = []
@@ -171,7 +179,7 @@ class AsyncDeviceService:
         if not control_responses:
             control_responses = ["No devices were controlled."]
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_control_multiple_devices", duration, 
                        {"device_count": len(user_messages)})
         
@@ -179,18 +187,18 @@ class AsyncDeviceService:
     
     async def query_device_status(self, device_uuid: str) -> Dict[str, Any]:
         """Query the status of a device asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         status = await self.api_client.get_status(device_uuid)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_query_device_status", duration, {"device_uuid": device_uuid})
         
         return {"device_uuid": device_uuid, "status": status}
     
     async def query_multiple_device_status(self, device_uuids: List[str]) -> List[Dict[str, Any]]:
         """Query the status of multiple devices concurrently."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Create tasks for concurrent execution
         tasks = [self.query_device_status(device_uuid) for device_uuid in device_uuids]
@@ -209,7 +217,7 @@ class AsyncDeviceService:
             else:
                 processed_results.append(result)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_query_multiple_device_status", duration, 
                        {"device_count": len(device_uuids)})
         
@@ -217,7 +225,7 @@ class AsyncDeviceService:
     
     async def schedule_device(self, device_uuid: str, user_message: str) -> Dict[str, Any]:
         """Schedule a device action asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Get device functions
         functions_json = await self.api_client.get_device_functions(device_uuid)
@@ -227,7 +235,7 @@ class AsyncDeviceService:
         possible_values = functions_json["data"]["functions"]
         
         # Use LLM to determine schedule parameters
-        llm_tool_functions = self.llm.bind_tools(tools=[DeviceSchedule], parallel_tool_calls=True)
+        llm_tool_functions = self._llm_schedule
         
         system_prompt = f"""You are an IoT assistant for scheduling devices.
 Your job is to extract scheduling parameters from the user message including time, days, and device function.
@@ -270,14 +278,14 @@ Extract the following:
                     "error": tool_call["args"].get("failure_reason", "Unknown failure")
                 })
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_schedule_device", duration, {"device_uuid": device_uuid})
         
         return {"results": results}
     
     async def schedule_multiple_devices(self, user_messages: List[Dict]) -> List[str]:
         """Schedule multiple devices based on user messages asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Create tasks for concurrent execution
         tasks = []
@@ -309,7 +317,7 @@ Extract the following:
                 device_uuid = user_messages[i]["device_uuid"]
                 schedule_responses.append(f"❌ No schedule created for device {device_uuid}")
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_schedule_multiple_devices", duration, 
                        {"device_count": len(user_messages)})
         
@@ -317,10 +325,10 @@ Extract the following:
     
     async def trigger_scene_by_name(self, scene_name: str, available_scenes: List[Dict]) -> Dict[str, Any]:
         """Trigger a scene by name asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Use LLM to match scene name
-        llm_with_scene = self.llm.bind_tools(tools=[Scene])
+        llm_with_scene = self._llm_scene
         
         system_prompt = prompt_manager.get_scene_activation_prompt(scene_name, str(available_scenes))
         
@@ -332,7 +340,7 @@ Extract the following:
             
             result = await self.api_client.trigger_scene(scene_uuid)
             
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             log_performance(self.logger, "async_trigger_scene_by_name", duration, {"scene_name": scene_name})
             
             return {
@@ -341,7 +349,7 @@ Extract the following:
                 "response": result
             }
         else:
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             log_performance(self.logger, "async_trigger_scene_by_name", duration, {"scene_name": scene_name})
             
             return {
@@ -351,7 +359,7 @@ Extract the following:
     
     async def get_scenes(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Dict]:
         """Get all scenes for a space asynchronously."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         scenes = await self.api_client.get_scenes(project_uuid, community_uuid, space_uuid)
         collected_scenes = []
@@ -361,14 +369,14 @@ Extract the following:
                 "scene_uuid": scene["uuid"]
             })
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_get_scenes", duration, {"scene_count": len(collected_scenes)})
         
         return collected_scenes
     
     async def execute_batch_operations(self, operations: List[Dict]) -> List[Dict]:
         """Execute multiple different types of operations concurrently."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         tasks = []
         for operation in operations:
@@ -411,7 +419,7 @@ Extract the following:
                     "result": result
                 })
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "async_execute_batch_operations", duration, 
                        {"operation_count": len(operations)})
         
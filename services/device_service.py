@@ -3,6 +3,9 @@ Centralized device service for IoT device operations.
 Eliminates code duplication by providing unified device control logic.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import pandas as pd
 import time
 from typing import List, Dict, Any, Optional
@@ -23,8 +26,20 @@ class DeviceService:
     def __init__(self, api_client: SyncrowAPIClient):
         self.api_client = api_client
         self.llm = get_qwen_llm()
+        # Tool schemas are fixed, so bind each extraction variant once
+        self._llm_control = self.llm.bind_tools(tools=[DeviceFunction], parallel_tool_calls=True)
+        self._llm_schedule = self.llm.bind_tools(tools=[DeviceSchedule], parallel_tool_calls=True)
+        self._llm_scene = self.llm.bind_tools(tools=[Scene])
         self.device_descriptions = pd.read_csv(Config.CSV_PATH)
+        self._descriptions_by_product_type = self._index_device_descriptions(self.device_descriptions)
         self.logger = get_logger(__name__)
+        # (project, community, space) -> (fetched_at, devices)
+        self._devices_cache: Dict[tuple, tuple] = {}
+        self._devices_ttl = Config.DEVICE_CACHE_TTL
+        # (project, community, space) -> (fetched_at, scenes), same lifetime as devices
+        self._scenes_cache: Dict[tuple, tuple] = {}
+        # Worker threads for the sync per-device fan-out (results keep request order)
+        self._io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="device-io")
     
     def _ensure_valid_token(self) -> bool:
         """Ensure we have a valid token before making API calls."""
@@ -35,10 +50,28 @@ class DeviceService:
             return new_token is not None
         return True
     
-    @cached("devices_in_space", ttl=300)  # Cache for 5 minutes
     def get_devices_in_space(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Device]:
-        """Get all devices in a specific space."""
-        start_time = time.time()
+        """Get all devices in a specific space, served from a short-lived cache when fresh."""
+        key = (project_uuid, community_uuid, space_uuid)
+        cached = self._get_fresh(self._devices_cache, key)
+        if cached is not None:
+            return cached
+        
+        devices = self._fetch_devices_in_space(project_uuid, community_uuid, space_uuid)
+        if devices:
+            self._devices_cache[key] = (time.monotonic(), devices)
+        return devices
+    
+    def _get_fresh(self, cache: Dict[tuple, tuple], key: tuple) -> Optional[Any]:
+        """Return the cached value for key if it is younger than the device TTL."""
+        cached_entry = cache.get(key)
+        if cached_entry and time.monotonic() - cached_entry[0] < self._devices_ttl:
+            return cached_entry[1]
+        return None
+    
+    def _fetch_devices_in_space(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Device]:
+        """Fetch all devices in a specific space from the Syncrow API."""
+        start_time = time.perf_counter()
         
         # Ensure we have a valid token
         if not self._ensure_valid_token():
@@ -63,7 +96,7 @@ class DeviceService:
                     tag=device_json["deviceTag"]["name"] if device_json["deviceTag"] else None
                 ))
             
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             log_performance(self.logger, "get_devices_in_space", duration, {"device_count": len(devices)})
             self.logger.info(f"Retrieved {len(devices)} devices for space {space_uuid}")
             return devices
@@ -71,24 +104,35 @@ class DeviceService:
             self.logger.warning(f"Failed to fetch devices: {devices_json}")
             return []
     
+    async def aget_devices_in_space(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Device]:
+        """Get all devices in a specific space without blocking the event loop."""
+        # A fresh cache hit needs no worker thread
+        cached = self._get_fresh(self._devices_cache, (project_uuid, community_uuid, space_uuid))
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.get_devices_in_space, project_uuid, community_uuid, space_uuid)
+    
+    @staticmethod
+    def _index_device_descriptions(device_descriptions: pd.DataFrame) -> Dict[str, List[str]]:
+        """Render every CSV row once and group the descriptions by product type."""
+        descriptions_by_product_type: Dict[str, List[str]] = {}
+        for row in device_descriptions.itertuples(index=False):
+            descriptions_by_product_type.setdefault(row.product_type, []).append(f"""
+                "Product Type": {row.product_type},
+                "Code": {row.code},
+                "Code Description": {row.code_description},
+                "Value": {row.value},
+                "Value Description": {row.value_description}
+            """)
+        return descriptions_by_product_type
+    
     def get_device_descriptions(self, product_type: str) -> List[str]:
         """Get device descriptions for a specific product type."""
-        rows = self.device_descriptions[self.device_descriptions["product_type"] == product_type]
-        descriptions = []
-        for row in rows.values:
-            code, code_description, value, value_description, product_type = row
-            descriptions.append(f"""
-                "Product Type": {product_type},
-                "Code": {code},
-                "Code Description": {code_description},
-                "Value": {value},
-                "Value Description": {value_description}
-            """)
-        return descriptions
+        return list(self._descriptions_by_product_type.get(product_type, []))
     
     def control_device(self, device_uuid: str, user_message: str, product_type: str) -> Dict[str, Any]:
         """Control a device based on user message."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Ensure we have a valid token
         if not self._ensure_valid_token():
@@ -106,7 +150,7 @@ class DeviceService:
         descriptions = self.get_device_descriptions(product_type)
         
         # Use LLM to determine the correct function and value
-        llm_tool_functions = self.llm.bind_tools(tools=[DeviceFunction], parallel_tool_calls=True)
+        llm_tool_functions = self._llm_control
         
         system_prompt = prompt_manager.get_device_control_prompt(
             str([{"device_uuid": device_uuid, "user_message": user_message, "product_type": product_type}]),
@@ -145,45 +189,224 @@ class DeviceService:
                     "error": error_msg
                 })
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         log_performance(self.logger, "control_device", duration, {"device_uuid": device_uuid})
         
         return {"results": results}
     
+    async def acontrol_device(self, device_uuid: str, user_message: str, product_type: str,
+                              code: Optional[str] = None, value: Any = None) -> Dict[str, Any]:
+        """Control a device based on user message without blocking the event loop.
+        
+        When the intent classifier already resolved the function ``code`` and ``value``,
+        the command is sent directly without the function lookup and extraction LLM call.
+        """
+        start_time = time.perf_counter()
+        
+        # Ensure we have a valid token
+        if not await asyncio.to_thread(self._ensure_valid_token):
+            self.logger.error("Failed to obtain valid token for device control")
+            return {"error": "Authentication failed. Please re-login."}
+        
+        resolved = await self._aresolve_commands(device_uuid, user_message, product_type, code, value)
+        if "error" in resolved:
+            return resolved
+        
+        results = [await self._asend_control([device_uuid], code, value) for code, value in resolved["commands"]]
+        results = [result for sent in results for result in sent] + resolved["failures"]
+        
+        duration = time.perf_counter() - start_time
+        log_performance(self.logger, "acontrol_device", duration, {"device_uuid": device_uuid})
+        
+        return {"results": results}
+    
+    async def _aresolve_commands(self, device_uuid: str, user_message: str, product_type: str,
+                                 code: Optional[str] = None, value: Any = None) -> Dict[str, Any]:
+        """Work out the (code, value) commands for one device instruction."""
+        if code is not None:
+            return {"commands": [(code, value)], "failures": []}
+        
+        functions_json = await self.api_client.aget_device_functions(device_uuid)
+        if functions_json.get("statusCode") != 201:
+            log_device_operation(self.logger, "control_device", device_uuid, False, 
+                               {"error": "Failed to get device functions"})
+            return {"error": "Failed to get device functions"}
+        
+        descriptions = self.get_device_descriptions(product_type)
+        
+        llm_tool_functions = self._llm_control
+        
+        system_prompt = prompt_manager.get_device_control_prompt(
+            str([{"device_uuid": device_uuid, "user_message": user_message, "product_type": product_type}]),
+            "\n".join(descriptions),
+            user_message
+        )
+        
+        response = await llm_tool_functions.ainvoke([SystemMessage(content=system_prompt)])
+        
+        commands = []
+        failures = []
+        for tool_call in response.tool_calls:
+            if tool_call["args"]["status"] == "Success":
+                commands.append((tool_call["args"]["code"], tool_call["args"]["value"]))
+            else:
+                error_msg = tool_call["args"].get("failure_reason", "Unknown failure")
+                log_device_operation(self.logger, "control_device", device_uuid, False, 
+                                   {"error": error_msg})
+                failures.append({
+                    "device_uuid": device_uuid,
+                    "success": False,
+                    "error": error_msg
+                })
+        
+        return {"commands": commands, "failures": failures}
+    
+    async def _asend_control(self, device_uuids: List[str], code: str, value: Any) -> List[Dict[str, Any]]:
+        """Send one resolved command to a group of devices in a single batch call."""
+        try:
+            control_response = await asyncio.to_thread(
+                self.api_client.batch_control, "COMMAND", device_uuids, code, value
+            )
+        except Exception as e:
+            control_response = {"error": str(e)}
+        
+        success = "error" not in control_response
+        results = []
+        for device_uuid in device_uuids:
+            log_device_operation(self.logger, "control_device", device_uuid, success, 
+                               {"code": code, "value": value, "response": control_response})
+            results.append({
+                "device_uuid": device_uuid,
+                "success": success,
+                "response": control_response
+            })
+        return results
+    
     def control_multiple_devices(self, user_messages: List[Dict], devices: List[Device]) -> List[str]:
         """Control multiple devices based on user messages."""
         control_responses = []
         
-        # Process each device individually for better reliability
-        for user_message in user_messages:
-            device_uuid = user_message["device_uuid"]
-            user_message_text = user_message["user_message"]
-            product_type = user_message["product_type"]
-            
-            # Use the single device control method for each device
-            result = self.control_device(device_uuid, user_message_text, product_type)
-            
-            if "error" in result:
-                control_responses.append(f"Error controlling device {device_uuid}: {result['error']}")
-            elif result.get("results"):
-                for device_result in result["results"]:
-                    if device_result["success"]:
-                        control_responses.append(f"✅ Successfully controlled device {device_uuid}")
-                    else:
-                        control_responses.append(f"❌ Failed to control device {device_uuid}: {device_result['error']}")
+        # Log in once up front so the parallel workers do not race to do it
+        self._ensure_valid_token()
+        
+        # Process each device individually for better reliability, all devices at once
+        results = self._io_pool.map(
+            lambda user_message: self.control_device(
+                user_message["device_uuid"], user_message["user_message"], user_message["product_type"]
+            ),
+            user_messages
+        )
+        for user_message, result in zip(user_messages, results):
+            control_responses.extend(self._format_control_result(user_message["device_uuid"], result))
+        
+        if not control_responses:
+            control_responses = ["No devices were controlled."]
+        
+        return control_responses
+    
+    async def acontrol_multiple_devices(self, user_messages: List[Dict], devices: List[Device]) -> List[str]:
+        """Control multiple devices concurrently based on user messages.
+        
+        Commands are resolved per device in parallel, then devices sharing the same
+        (code, value) are sent together in one batch call.
+        """
+        if not await asyncio.to_thread(self._ensure_valid_token):
+            self.logger.error("Failed to obtain valid token for device control")
+            return [
+                f"Error controlling device {user_message['device_uuid']}: Authentication failed. Please re-login."
+                for user_message in user_messages
+            ] or ["No devices were controlled."]
+        
+        resolutions = await asyncio.gather(
+            *(
+                self._aresolve_commands(
+                    user_message["device_uuid"], user_message["user_message"], user_message["product_type"],
+                    user_message.get("code"), user_message.get("value")
+                )
+                for user_message in user_messages
+            ),
+            return_exceptions=True
+        )
+        resolutions = [
+            {"error": str(resolution)} if isinstance(resolution, Exception) else resolution
+            for resolution in resolutions
+        ]
+        
+        # (code, serialized value) -> command and the devices it applies to
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for index, (user_message, resolution) in enumerate(zip(user_messages, resolutions)):
+            for code, value in resolution.get("commands", []):
+                key = (code, orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS))
+                group = groups.setdefault(key, {"code": code, "value": value, "members": []})
+                group["members"].append((index, user_message["device_uuid"]))
+        
+        sent = await asyncio.gather(*(
+            self._asend_control(
+                list(dict.fromkeys(device_uuid for _, device_uuid in group["members"])), group["code"], group["value"]
+            )
+            for group in groups.values()
+        ))
+        
+        # Map each batch outcome back to the instruction(s) that asked for it
+        results_by_index: Dict[int, List[Dict[str, Any]]] = {}
+        for group, group_results in zip(groups.values(), sent):
+            result_by_device = {result["device_uuid"]: result for result in group_results}
+            for index, device_uuid in group["members"]:
+                results_by_index.setdefault(index, []).append(result_by_device[device_uuid])
+        
+        control_responses = []
+        for index, (user_message, resolution) in enumerate(zip(user_messages, resolutions)):
+            if "error" in resolution:
+                result = resolution
             else:
-                control_responses.append(f"❌ No action taken for device {device_uuid}")
+                result = {"results": results_by_index.get(index, []) + resolution["failures"]}
+            control_responses.extend(self._format_control_result(user_message["device_uuid"], result))
         
         if not control_responses:
             control_responses = ["No devices were controlled."]
         
         return control_responses
     
+    def _format_control_result(self, device_uuid: str, result: Dict[str, Any]) -> List[str]:
+        """Turn a control_device result into user-facing response lines."""
+        if "error" in result:
+            return [f"Error controlling device {device_uuid}: {result['error']}"]
+        if not result.get("results"):
+            return [f"❌ No action taken for device {device_uuid}"]
+        
+        lines = []
+        for device_result in result["results"]:
+            if device_result["success"]:
+                lines.append(f"✅ Successfully controlled device {device_uuid}")
+            else:
+                lines.append(f"❌ Failed to control device {device_uuid}: {device_result['error']}")
+        return lines
+    
     def query_device_status(self, device_uuid: str) -> Dict[str, Any]:
         """Query the status of a device."""
         status = self.api_client.get_status(device_uuid)
         return {"device_uuid": device_uuid, "status": status}
     
+    async def aquery_device_status(self, device_uuid: str) -> Dict[str, Any]:
+        """Query the status of a device without blocking the event loop."""
+        status = await self.api_client.aget_status(device_uuid)
+        return {"device_uuid": device_uuid, "status": status}
+    
+    def describe_device_status(self, device_name: str, status: Dict[str, Any]) -> str:
+        """Render a get_status response as a short sentence for the user."""
+        if "error" in status:
+            return f"Could not read the status of {device_name}: {status['error']}"
+        
+        data = status.get("data")
+        if isinstance(data, dict):
+            data = data.get("status", [])
+        # Entries without a reported value say nothing about the device
+        readings = [f"{item['code']} is {item['value']}" for item in data or [] if "code" in item and "value" in item]
+        
+        if not readings:
+            return f"No status reported for {device_name}."
+        return f"{device_name}: " + ", ".join(readings) + "."
+    
     def schedule_device(self, device_uuid: str, user_message: str) -> Dict[str, Any]:
         """Schedule a device action."""
         # Get device functions
@@ -194,7 +417,7 @@ class DeviceService:
         possible_values = functions_json["data"]["functions"]
         
         # Use LLM to determine schedule parameters
-        llm_tool_functions = self.llm.bind_tools(tools=[DeviceSchedule], parallel_tool_calls=True)
+        llm_tool_functions = self._llm_schedule
         
         system_prompt = f"""You are an IoT assistant for scheduling devices.
 Your job is to extract scheduling parameters from the user message including time, days, and device function.
@@ -243,11 +466,15 @@ Extract the following:
         """Schedule multiple devices based on user messages."""
         code_descriptions = {"control": "Commands: open, stop, close - controls the direction of the curtains"}
         descriptions = []
-        llm_tool_functions = self.llm.bind_tools(tools=[DeviceSchedule], parallel_tool_calls=True)
+        llm_tool_functions = self._llm_schedule
         
-        for user_message in user_messages:
+        functions_responses = self._io_pool.map(
+            lambda user_message: self.api_client.get_device_functions(user_message["device_uuid"]),
+            user_messages
+        )
+        
+        for user_message, functions_json in zip(user_messages, functions_responses):
             device_uuid = user_message["device_uuid"]
-            functions_json = self.api_client.get_device_functions(device_uuid)
             if functions_json.get("statusCode") == 201:
                 possible_values = functions_json["data"]["functions"]
                 user_message["possible_values"] = possible_values
@@ -255,34 +482,76 @@ Extract the following:
                     if possible_value["code"] in code_descriptions.keys():
                         descriptions.append({possible_value["code"]: code_descriptions[possible_value["code"]]})
             else:
-                print("[WARN] Failed at fetching functions")
+                self.logger.warning(f"Failed at fetching functions for device {device_uuid}")
                 user_message["possible_values"] = None
         
-        system_prompt = prompt_manager.get_device_schedule_prompt(str(user_messages), str(descriptions))
+        # JSON rather than Python repr: cheaper to build and clearer for the model
+        system_prompt = prompt_manager.get_device_schedule_prompt(
+            orjson.dumps(user_messages, default=str).decode(), orjson.dumps(descriptions).decode()
+        )
         
         response = llm_tool_functions.invoke([SystemMessage(content=system_prompt)])
-        AI_messages = []
+        schedule_futures = []
         
         for tool_call in response.tool_calls:
             if tool_call["args"]["status"] == "Success":
-                code = tool_call["args"]["code"]
-                value = tool_call["args"]["value"]
-                device_uuid = tool_call["args"]["device_uuid"]
-                time = tool_call["args"]["time"]
-                days = tool_call["args"]["days"]
-                
-                control_response = self.api_client.add_schedule(device_uuid, "category_name", time, code, value, days)
-                print(control_response)
-                AI_messages.append(control_response)
+                args = tool_call["args"]
+                schedule_futures.append(self._io_pool.submit(
+                    self.api_client.add_schedule,
+                    args["device_uuid"], "category_name", args["time"], args["code"], args["value"], args["days"]
+                ))
+            else:
+                self.logger.warning(f"Schedule extraction failed: {tool_call['args'].get('failure_reason')}")
+        
+        return [future.result() for future in schedule_futures]
+    
+    async def aschedule_multiple_devices(self, user_messages: List[Dict]) -> List[Dict]:
+        """Schedule multiple devices based on user messages without blocking the event loop."""
+        code_descriptions = {"control": "Commands: open, stop, close - controls the direction of the curtains"}
+        descriptions = []
+        llm_tool_functions = self._llm_schedule
+        
+        functions_responses = await asyncio.gather(*(
+            self.api_client.aget_device_functions(user_message["device_uuid"])
+            for user_message in user_messages
+        ))
+        
+        for user_message, functions_json in zip(user_messages, functions_responses):
+            device_uuid = user_message["device_uuid"]
+            if functions_json.get("statusCode") == 201:
+                possible_values = functions_json["data"]["functions"]
+                user_message["possible_values"] = possible_values
+                for possible_value in possible_values:
+                    if possible_value["code"] in code_descriptions.keys():
+                        descriptions.append({possible_value["code"]: code_descriptions[possible_value["code"]]})
             else:
-                print(tool_call["args"]["failure_reason"])
+                self.logger.warning(f"Failed at fetching functions for device {device_uuid}")
+                user_message["possible_values"] = None
         
-        return AI_messages
+        # JSON rather than Python repr: cheaper to build and clearer for the model
+        system_prompt = prompt_manager.get_device_schedule_prompt(
+            orjson.dumps(user_messages, default=str).decode(), orjson.dumps(descriptions).decode()
+        )
+        
+        response = await llm_tool_functions.ainvoke([SystemMessage(content=system_prompt)])
+        
+        schedule_calls = []
+        for tool_call in response.tool_calls:
+            if tool_call["args"]["status"] == "Success":
+                args = tool_call["args"]
+                schedule_calls.append(asyncio.to_thread(
+                    self.api_client.add_schedule,
+                    args["device_uuid"], "category_name", args["time"], args["code"], args["value"], args["days"]
+                ))
+            else:
+                self.logger.warning(f"Schedule extraction failed: {tool_call['args'].get('failure_reason')}")
+        
+        return list(await asyncio.gather(*schedule_calls))
     
     def trigger_scene_by_name(self, scene_name: str, available_scenes: List[Dict]) -> Dict[str, Any]:
         """Trigger a scene by name."""
         # Use LLM to match scene name
-        llm_with_scene = self.llm.bind_tools(tools=[Scene])
+        llm_with_scene = self._llm_scene
         
         system_prompt = prompt_manager.get_scene_activation_prompt(scene_name, str(available_scenes))
         
@@ -304,8 +573,37 @@ Extract the following:
                 "error": f"Scene '{scene_name}' not found"
             }
     
+    async def atrigger_scene_by_name(self, scene_name: str, available_scenes: List[Dict]) -> Dict[str, Any]:
+        """Trigger a scene by name without blocking the event loop."""
+        llm_with_scene = self._llm_scene
+        
+        system_prompt = prompt_manager.get_scene_activation_prompt(scene_name, str(available_scenes))
+        
+        response = await llm_with_scene.ainvoke([SystemMessage(content=system_prompt)])
+        
+        if response.tool_calls and response.tool_calls[0]["args"]["scene_uuid"]:
+            scene_uuid = response.tool_calls[0]["args"]["scene_uuid"]
+            scene_name = response.tool_calls[0]["args"]["scene_name"]
+            
+            result = await asyncio.to_thread(self.api_client.trigger_scene, scene_uuid)
+            return {
+                "success": True,
+                "scene_name": scene_name,
+                "response": result
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Scene '{scene_name}' not found"
+            }
+    
     def get_scenes(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Dict]:
-        """Get all scenes for a space."""
+        """Get all scenes for a space, served from a short-lived cache when fresh."""
+        key = (project_uuid, community_uuid, space_uuid)
+        cached = self._get_fresh(self._scenes_cache, key)
+        if cached is not None:
+            return cached
+        
         scenes = self.api_client.get_scenes(project_uuid, community_uuid, space_uuid)
         collected_scenes = []
         for scene in scenes.get("data", []):
@@ -313,4 +611,13 @@ Extract the following:
                 "scene_name": scene["name"],
                 "scene_uuid": scene["uuid"]
             })
+        if "error" not in scenes:
+            self._scenes_cache[key] = (time.monotonic(), collected_scenes)
         return collected_scenes
+    
+    async def aget_scenes(self, project_uuid: str, community_uuid: str, space_uuid: str) -> List[Dict]:
+        """Get all scenes for a space without blocking the event loop."""
+        cached = self._get_fresh(self._scenes_cache, (project_uuid, community_uuid, space_uuid))
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.get_scenes, project_uuid, community_uuid, space_uuid)
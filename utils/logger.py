@@ -3,7 +3,10 @@ Centralized logging system for the ragent_chatbot project.
 Provides structured logging with different levels and formatters.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import json
 from datetime import datetime
@@ -63,6 +66,7 @@ class RagentLogger:
     
     _loggers = {}
     _initialized = False
+    _listener = None
     
     @classmethod
     def setup_logging(cls, 
@@ -85,6 +89,7 @@ class RagentLogger:
         
         # Clear existing handlers
         root_logger.handlers.clear()
+        handlers = []
         
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
@@ -102,7 +107,7 @@ class RagentLogger:
             )
         
         console_handler.setFormatter(console_formatter)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
         # File handler (if specified)
         if log_file:
@@ -117,7 +122,15 @@ class RagentLogger:
                 )
             
             file_handler.setFormatter(file_formatter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        
+        # Callers only enqueue records; a background thread does the formatting and I/O,
+        # so logging on the event loop never blocks on stdout or the log file
+        log_queue = queue.SimpleQueue()
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        cls._listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        cls._listener.start()
+        atexit.register(cls._listener.stop)
         
         cls._initialized = True
     
@@ -138,6 +151,10 @@ class RagentLogger:
                     status_code: Optional[int] = None, response_time: Optional[float] = None,
                     error: Optional[str] = None):
         """Log API call details."""
+        # Called on every request; skip building the record when the level is filtered out
+        if not logger.isEnabledFor(logging.ERROR if error else logging.INFO):
+            return
+        
         extra_fields = {
             "api_method": method,
             "api_url": url,
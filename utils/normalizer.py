@@ -4,7 +4,10 @@ Centralized message processing to eliminate duplication.
 """
 
 from typing import List, Dict, Any, Optional
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, messages_from_dict
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage, messages_from_dict
+
+# Message class for each chat role; unknown roles are treated as the user
+ROLE_MESSAGE_CLASSES = {"user": HumanMessage, "assistant": AIMessage, "system": SystemMessage}
 
 class MessageNormalizer:
     """Centralized utility class for normalizing messages."""
@@ -12,20 +15,21 @@ class MessageNormalizer:
     @staticmethod
     def normalize_messages(raw_messages: List[Any]) -> List[BaseMessage]:
         """Normalize messages to LangChain format."""
+        # Graph state always holds message objects already (add_messages coerces them)
+        if all(isinstance(m, BaseMessage) for m in raw_messages):
+            return list(raw_messages)
+        
         messages = []
         
         for m in raw_messages:
             if isinstance(m, BaseMessage):
                 messages.append(m)
             elif isinstance(m, dict):
-                # Convert role-based dicts to LangChain format
+                # Convert role-based dicts to LangChain format directly, skipping the
+                # per-item serialization dispatch of messages_from_dict
                 if "role" in m and "content" in m:
-                    role_to_type = {"user": "human", "assistant": "ai", "system": "system"}
-                    message_type = role_to_type.get(m["role"], "human")
-                    messages.extend(messages_from_dict([{
-                        "type": message_type,
-                        "data": {"content": m["content"]}
-                    }]))
+                    message_class = ROLE_MESSAGE_CLASSES.get(m["role"], HumanMessage)
+                    messages.append(message_class(content=m["content"]))
                 elif "type" in m and "data" in m:
                     messages.extend(messages_from_dict([m]))
                 else:
@@ -64,7 +68,12 @@ class MessageNormalizer:
     @staticmethod
     def find_user_message(messages: List[BaseMessage]) -> Optional[str]:
         """Find the latest user message from a list of messages."""
-        for msg in reversed(messages):
+        # Fast path: the new user message is almost always last
+        if messages and messages[-1].type == "human" and messages[-1].content:
+            return messages[-1].content
+        
+        for i in range(len(messages) - 2, -1, -1):
+            msg = messages[i]
             if msg.type == "human" and msg.content:
                 return msg.content
         return None
@@ -77,25 +86,20 @@ class MessageNormalizer:
         while i < len(messages):
             msg = messages[i]
             
-            # If this is an AI message with tool calls, check if it has responses
-            if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                tool_call_ids = {tc['id'] for tc in msg.tool_calls}
-                
-                # Look ahead for tool response messages
+            # An AI message with tool calls is answered by the tool messages right after it
+            if isinstance(msg, AIMessage) and msg.tool_calls:
                 j = i + 1
-                found_responses = set()
-                while j < len(messages) and hasattr(messages[j], 'tool_call_id'):
-                    found_responses.add(messages[j].tool_call_id)
+                while j < len(messages) and isinstance(messages[j], ToolMessage):
                     j += 1
                 
-                # Only include if all tool calls have responses
-                if tool_call_ids == found_responses:
+                # Keep the whole run only if it answers exactly these calls; otherwise drop
+                # the call and let its responses be handled as ordinary messages
+                if {tc["id"] for tc in msg.tool_calls} == {m.tool_call_id for m in messages[i + 1:j]}:
                     filtered_messages.extend(messages[i:j])
                     i = j
-                else:
-                    i += 1
+                    continue
             else:
                 filtered_messages.append(msg)
-                i += 1
+            i += 1
         
         return filtered_messages